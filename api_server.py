@@ -0,0 +1,84 @@
+#api_server.py
+# Локальный API фонового процесса на Unix-сокете для других программ
+# (дополнение командной строки, плагин редактора). Протокол тот же, что у
+# serve --stdio. Сокет читается в своих потоках и окно Tk не трогает
+import os
+import socket
+import struct
+import threading
+
+from daemon import close_unix_server, open_unix_server
+
+SOCKET_PATH = os.path.join(os.path.expanduser('~'), '.credmanager', 'api.sock')
+
+# Сколько ждать следующего запроса в открытом соединении
+IDLE_TIMEOUT = 300.0
+
+
+def peer_uid(connection):
+    """uid процесса на другой стороне сокета или None, если система его не сообщает"""
+    option = getattr(socket, 'SO_PEERCRED', None)
+    if option is None:
+        return None
+    try:
+        credentials = connection.getsockopt(socket.SOL_SOCKET, option, struct.calcsize('3i'))
+    except OSError:
+        return None
+    return struct.unpack('3i', credentials)[1]
+
+
+class ApiServer:
+    """Сокет запросов: поток приема и по потоку на соединение"""
+
+    def __init__(self, queries, path=SOCKET_PATH):
+        self.queries = queries
+        self.path = path
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        """Создает сокет (доступен только владельцу) и начинает прием.
+
+        Возвращает False, если Unix-сокеты не поддерживаются.
+        """
+        if not hasattr(socket, 'AF_UNIX'):
+            return False
+        # Оставшийся сокет - от аварийно завершенного процесса; второй фоновый
+        # процесс сюда не доходит (его останавливает DaemonListener)
+        self.server = open_unix_server(self.path, backlog=16)
+        self.thread = threading.Thread(target=self.accept_loop, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """Закрывает сокет и удаляет его файл; открытые соединения закроются с процессом"""
+        if self.server is None:
+            return
+        server, self.server = self.server, None
+        close_unix_server(server, self.path)
+
+    def accept_loop(self):
+        """Поток приема соединений"""
+        while self.server is not None:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                # Сокет закрыт в stop
+                return
+            uid = peer_uid(connection)
+            if uid is not None and uid != os.getuid():
+                connection.close()
+                continue
+            threading.Thread(target=self.serve_connection, args=(connection,), daemon=True).start()
+
+    def serve_connection(self, connection):
+        """Отвечает на запросы одного соединения, пока клиент его не закроет"""
+        with connection:
+            connection.settimeout(IDLE_TIMEOUT)
+            try:
+                for line in connection.makefile('rb'):
+                    if not line.strip():
+                        continue
+                    connection.sendall(self.queries.handle_line(line).encode('utf-8') + b"\n")
+            except OSError:
+                pass
@@ -0,0 +1,93 @@
+#bench_startup.py
+# Замер времени импорта main.py в холодном интерпретаторе (аналог -X importtime).
+# Завершается с кодом 1, если бюджет превышен или при старте загружается
+# модуль, который должен импортироваться лениво.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Модули, которые не должны загружаться при обычном запуске
+LAZY_MODULES = ['webbrowser', 'threading', 'subprocess', 'cProfile', 'pstats', 'settings_dialog',
+                'settings_general', 'settings_export', 'settings_import', 'settings_structure']
+
+DEFAULT_BUDGET_MS = 120.0
+
+
+def measure_once(module):
+    """Импортирует модуль в новом процессе и разбирает вывод -X importtime"""
+    probe = (
+        "import sys; import {0}; import json; "
+        "print(json.dumps(sorted(sys.modules)))"
+    ).format(module)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', probe],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    total_us = 0
+    per_module = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        per_module[name.strip()] = int(cumulative_us)
+
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return total_us, per_module, loaded
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Бюджет времени запуска main.py")
+    parser.add_argument('--runs', type=int, default=5, help="количество замеров")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="допустимая медиана суммарного времени импорта")
+    parser.add_argument('--module', default='main', help="замеряемый модуль")
+    parser.add_argument('--json', action='store_true', help="вывести результат в JSON")
+    args = parser.parse_args(argv)
+
+    totals = []
+    per_module = {}
+    loaded = []
+    for _ in range(args.runs):
+        total_us, per_module, loaded = measure_once(args.module)
+        totals.append(total_us / 1000.0)
+
+    median_ms = statistics.median(totals)
+    eager = [name for name in LAZY_MODULES if name in loaded]
+    slowest = sorted(per_module.items(), key=lambda item: item[1], reverse=True)[:10]
+
+    report = {
+        'module': args.module,
+        'runs': args.runs,
+        'median_ms': round(median_ms, 2),
+        'min_ms': round(min(totals), 2),
+        'max_ms': round(max(totals), 2),
+        'budget_ms': args.budget_ms,
+        'eager_imports': eager,
+        'slowest_cumulative_us': dict(slowest),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(f"Импорт {args.module}: медиана {median_ms:.1f} мс "
+              f"(мин {min(totals):.1f}, макс {max(totals):.1f}), бюджет {args.budget_ms:.1f} мс")
+        for name, cumulative in slowest:
+            print(f"  {cumulative / 1000.0:8.2f} мс  {name}")
+        if eager:
+            print("Загружены при старте, хотя должны импортироваться лениво: " + ", ".join(eager))
+
+    if median_ms > args.budget_ms or eager:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
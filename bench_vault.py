@@ -0,0 +1,320 @@
+#bench_vault.py
+# Замеры путей работы с данными на синтетических хранилищах: генератор
+# хранилищ заданного размера и формы и набор замеров с выводом в JSON,
+# чтобы сравнивать прогоны между собой (--compare).
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+# Доли типов записей по умолчанию
+DEFAULT_MIX = {'folder': 0.1, 'text': 0.2, 'url': 0.2, 'totp': 0.1, 'password': 0.4}
+
+DEFAULT_SIZES = [1000, 10000]
+DEFAULT_RUNS = 5
+
+# Во сколько раз медиана может вырасти относительно прошлого прогона без предупреждения
+REGRESSION_RATIO = 1.2
+
+BASE32 = "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+
+
+def parse_mix(text):
+    """Разбирает доли типов вида "folder=1,password=4" """
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"неизвестный тип записи: {name}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def leaf_value(value_type, number, rng):
+    """Значение записи заданного типа"""
+    if value_type == 'url':
+        return f"https://host{number}.example.com/login"
+    if value_type == 'totp':
+        return "".join(rng.choice(BASE32) for _ in range(16))
+    if value_type == 'password':
+        return "".join(rng.choice(string.ascii_letters + string.digits) for _ in range(16))
+    return f"user{number}@example.com"
+
+
+def generate_vault(size, depth=3, fanout=10, mix=None, legacy=0.0, seed=0):
+    """Синтетическое хранилище из size записей (папки тоже считаются).
+
+    depth - наибольшая вложенность папок, fanout - записей в папке (когда
+    папки заполнены, остаток раскладывается по ним по кругу), legacy - доля
+    папок и записей в старом формате (папка - список, значение - строка).
+    """
+    rng = random.Random(seed)
+    types, weights = zip(*(mix or DEFAULT_MIX).items())
+    leaf_types = [name for name in types if name != 'folder']
+    leaf_weights = [weight for name, weight in zip(types, weights) if name != 'folder']
+
+    root = []
+    folders = [(root, 0)]
+    count = 0
+    position = 0
+    # Сначала папки заполняются в ширину до fanout записей
+    while position < len(folders) and count < size:
+        records, level = folders[position]
+        position += 1
+        for _ in range(fanout):
+            if count >= size:
+                break
+            count += 1
+            value_type = rng.choices(types, weights)[0] if level + 1 < depth else 'folder'
+            if value_type == 'folder' and level + 1 >= depth:
+                value_type = rng.choices(leaf_types, leaf_weights)[0]
+            name = f"{value_type}-{count}"
+            if value_type == 'folder':
+                children = []
+                folders.append((children, level + 1))
+                if rng.random() < legacy:
+                    records.append({name: children})
+                else:
+                    records.append({name: {'type': 'folder', 'value': children}})
+            else:
+                value = leaf_value(value_type, count, rng)
+                if rng.random() < legacy:
+                    records.append({name: value})
+                else:
+                    records.append({name: {'type': value_type, 'value': value}})
+
+    # Остаток - по кругу во все папки сверх fanout
+    position = 0
+    while count < size:
+        records, _ = folders[position % len(folders)]
+        position += 1
+        count += 1
+        value_type = rng.choices(leaf_types, leaf_weights)[0]
+        records.append({f"{value_type}-{count}": {'type': value_type,
+                                                  'value': leaf_value(value_type, count, rng)}})
+    return root
+
+
+def measure(function, runs, setup=None):
+    """Время выполнения function в миллисекундах (setup перед каждым замером не учитывается)"""
+    timings = []
+    for _ in range(runs):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        function(argument) if setup else function()
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return {
+        'runs': runs,
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3),
+    }
+
+
+def largest_folder(index):
+    """id папки с наибольшим числом записей"""
+    from vault_index import is_folder
+    folders = [node_id for node_id, node in index.nodes.items() if is_folder(node)]
+    return max(folders, key=lambda node_id: len(index.children(node_id)), default=None)
+
+
+def bench_storage(data_file, records, legacy_records, runs):
+    """Замеры без окна: чтение, нормализация, индекс, поиск и запись"""
+    import vault_storage
+    from vault_journal import VaultJournal
+    from search_index import SearchIndex
+
+    results = {}
+    cache_file = vault_storage.get_cache_file(data_file)
+
+    def drop_cache():
+        if os.path.exists(cache_file):
+            os.unlink(cache_file)
+        return VaultJournal(data_file)
+
+    def write_legacy():
+        # Файл старого формата: без заголовка, папки - списки
+        with open(data_file, 'w', encoding='utf-8') as f:
+            json.dump(legacy_records, f, ensure_ascii=False)
+        return drop_cache()
+
+    results['convert_to_unified_format'] = measure(
+        vault_storage.convert_to_unified_format, runs, setup=lambda: copy.deepcopy(legacy_records))
+    # Чтение старого файла включает нормализацию, выдачу id и перезапись снимка
+    results['read_json_file legacy'] = measure(lambda journal: journal.load(), runs, setup=write_legacy)
+
+    vault_storage.write_vault(data_file, records)
+    # Первое чтение выдает записям id и перезаписывает файл - дальше обычное чтение
+    VaultJournal(data_file).load()
+
+    results['read_json_file'] = measure(lambda journal: journal.load(), runs, setup=drop_cache)
+    results['read_json_file cached'] = measure(lambda journal: journal.load(), runs,
+                                               setup=lambda: VaultJournal(data_file))
+
+    journal = VaultJournal(data_file)
+    journal.load()
+    results['save_json_file'] = measure(lambda: (journal.reindex(), journal.write_snapshot()), runs)
+    results['search index build'] = measure(lambda: SearchIndex(journal.index).build_haystack(), runs)
+    search_index = SearchIndex(journal.index)
+    results['search'] = measure(lambda: search_index.search("pass"), runs)
+    results['export pack'] = measure(
+        lambda: json.dumps(vault_storage.pack_document(journal.data), ensure_ascii=False), runs)
+    journal.close()
+    return results
+
+
+def bench_window(data_file, runs):
+    """Замеры окна и вкладок настроек; None, если Tk недоступен (нет дисплея)"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        return None, str(e)
+
+    from tkinter import ttk
+    import vault_storage
+    from main import CredentialsTable
+    from settings_export import ExportTab
+    from settings_import import ImportTab
+    from settings_structure import StructureTab
+
+    results = {}
+    root.withdraw()
+    try:
+        start = time.perf_counter()
+        app = CredentialsTable(root)
+        results['CredentialsTable init'] = {'runs': 1, 'median_ms': round((time.perf_counter() - start) * 1000.0, 3)}
+
+        results['get_current_table_data'] = measure(app.get_current_table_data, runs)
+        results['draw'] = measure(app.draw, runs)
+
+        # Смена папки: дерево перестраивается целиком
+        folder_id = largest_folder(app.journal.index)
+        folder_path = app.journal.index.ancestors(folder_id) + [folder_id] if folder_id else []
+
+        def switch_folder():
+            app.root = [] if app.root else list(folder_path)
+            app.update_tree()
+        results['update_tree switch folder'] = measure(switch_folder, runs)
+        app.root = []
+
+        def new_frame():
+            return ttk.Frame(root)
+        results['export tab build'] = measure(lambda frame: ExportTab(frame, app.data), runs, setup=new_frame)
+        export_tab = ExportTab(new_frame(), app.data)
+        export_tab.select_all()
+        results['export build_export_data'] = measure(export_tab.build_export_data, runs)
+
+        import_tab = ImportTab(new_frame(), [], None)
+        document = json.loads(json.dumps(vault_storage.pack_document(app.data)))
+
+        def load_import():
+            import_tab.import_data = import_tab.normalize_imported_data(copy.deepcopy(document))
+            import_tab.populate_import_tree()
+        results['import tree build'] = measure(load_import, runs)
+        import_tab.import_select_all()
+        results['import build_import_data'] = measure(
+            lambda: import_tab.build_import_data(import_tab.get_selected_import_items()), runs)
+
+        results['structure tab build'] = measure(
+            lambda frame: StructureTab(frame, app.data, None), runs, setup=new_frame)
+        structure_tab = StructureTab(new_frame(), app.data, None)
+        results['structure build_data_from_structure'] = measure(structure_tab.build_data_from_structure, runs)
+        app.journal.close()
+    finally:
+        root.destroy()
+    return results, None
+
+
+def run_size(size, args):
+    """Все замеры для одного размера хранилища во временном домашнем каталоге"""
+    import vault_storage
+
+    records = generate_vault(size, args.depth, args.fanout, args.mix, 0.0, args.seed)
+    legacy_records = generate_vault(size, args.depth, args.fanout, args.mix, args.legacy, args.seed)
+    data_file = vault_storage.get_data_file()
+    os.makedirs(os.path.dirname(data_file), exist_ok=True)
+
+    report = {'size': size, 'results': bench_storage(data_file, records, legacy_records, args.runs)}
+    if not args.no_window:
+        vault_storage.write_vault(data_file, records)
+        window_results, reason = bench_window(data_file, args.runs)
+        if window_results is None:
+            report['window_skipped'] = reason
+        else:
+            report['results'].update(window_results)
+    return report
+
+
+def compare(report, baseline):
+    """Печатает изменение медиан относительно прошлого прогона; True, если есть замедления"""
+    previous = {run['size']: run['results'] for run in baseline.get('sizes', [])}
+    slower = False
+    for run in report['sizes']:
+        old_results = previous.get(run['size'], {})
+        print(f"Размер {run['size']}:")
+        for name, result in run['results'].items():
+            old = old_results.get(name)
+            if not old or not old['median_ms']:
+                print(f"  {name:40} {result['median_ms']:10.3f} мс")
+                continue
+            ratio = result['median_ms'] / old['median_ms']
+            mark = "  ЗАМЕДЛЕНИЕ" if ratio > REGRESSION_RATIO else ""
+            slower = slower or bool(mark)
+            print(f"  {name:40} {result['median_ms']:10.3f} мс  было {old['median_ms']:.3f} ({ratio:.2f}x){mark}")
+    return slower
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Замеры работы с данными на синтетических хранилищах")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help="размеры хранилищ через запятую (от 1000 до 1000000)")
+    parser.add_argument('--depth', type=int, default=3, help="наибольшая вложенность папок")
+    parser.add_argument('--fanout', type=int, default=10, help="записей в папке")
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='доли типов, например "folder=1,text=2,url=2,totp=1,password=4"')
+    parser.add_argument('--legacy', type=float, default=1.0,
+                        help="доля старого формата в хранилище для замера нормализации")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help="замеров на операцию")
+    parser.add_argument('--no-window', action='store_true', help="не замерять окно и вкладки настроек")
+    parser.add_argument('--output', help="записать результат в JSON-файл")
+    parser.add_argument('--compare', help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    # Все файлы программы (данные, состояние, кэш) - во временном каталоге,
+    # который удаляется после замеров
+    with tempfile.TemporaryDirectory(prefix='credmanager-bench-') as home:
+        os.environ['HOME'] = home
+        os.environ['USERPROFILE'] = home
+        report = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': {'depth': args.depth, 'fanout': args.fanout, 'mix': args.mix,
+                       'legacy': args.legacy, 'seed': args.seed, 'runs': args.runs},
+            'sizes': [run_size(size, args) for size in sizes],
+        }
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            return 1 if compare(report, json.load(f)) else 0
+    if not args.output:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,166 @@
+#cli.py
+# Командная строка без окна: значение записи по пути для скриптов и
+# сервер запросов, который держит данные в памяти.
+# tkinter не импортируется, данные читаются тем же журналом, что и в окне
+import argparse
+import os
+import sys
+
+import vault_storage
+from vault_journal import VaultJournal
+from vault_index import is_folder
+from totp import TotpEngine
+
+# Коды завершения: запись не найдена, значение не получить, путь подходит
+# к нескольким записям (2 занят ошибками аргументов argparse)
+EXIT_NOT_FOUND = 1
+EXIT_FAILED = 3
+EXIT_AMBIGUOUS = 4
+
+
+def load_index(data_file=None):
+    """Загружает данные и возвращает индекс записей (None, если файла нет)"""
+    data_file = data_file or vault_storage.get_data_file()
+    if not os.path.exists(data_file):
+        return None
+    # Только чтение: запущенное окно может дописывать журнал в это время
+    journal = VaultJournal(data_file, read_only=True)
+    journal.load()
+    return journal.index
+
+
+def entry_value(node, totp=None):
+    """Значение записи для вывода: для TOTP - текущий код, None - неверный секрет"""
+    value = node.get('value', '')
+    if node.get('type') == 'totp':
+        totp = totp or TotpEngine()
+        return totp.code(value) if value else None
+    return value
+
+
+def copy_value(text):
+    """Копирует текст внешней утилитой буфера обмена без окна Tk"""
+    from clipboard import HelperBackend, PyperclipBackend, find_helper
+
+    helper = find_helper()
+    if helper:
+        backend = HelperBackend(helper)
+    else:
+        try:
+            import pyperclip
+        except ImportError:
+            print("Нет утилиты буфера обмена (wl-copy, xclip, xsel, pbcopy) или pyperclip",
+                  file=sys.stderr)
+            return False
+        backend = PyperclipBackend(pyperclip)
+    try:
+        backend.copy(text)
+    except Exception as e:
+        print(f"Ошибка копирования в буфер обмена: {e}", file=sys.stderr)
+        return False
+
+    # Автоочистка по той же настройке, что и в окне
+    from state_store import StateStore
+    import clipboard_clear
+    ttl = StateStore().settings({'clipboard_ttl': clipboard_clear.DEFAULT_TTL})['clipboard_ttl']
+    if ttl > 0 and text:
+        clipboard_clear.schedule_clear(text, ttl)
+    return True
+
+
+def command_get(args):
+    """credmanager get "Папка/Запись" - печатает или копирует значение"""
+    index = load_index(args.file)
+    found = index.resolve_all(args.path) if index is not None else []
+    if not found:
+        print(f"Запись не найдена: {args.path}", file=sys.stderr)
+        return EXIT_NOT_FOUND
+    if len(found) > 1:
+        # Например, папка "a" с записью "b" и запись с именем "a/b"
+        print(f"Путь подходит к нескольким записям: {args.path}", file=sys.stderr)
+        return EXIT_AMBIGUOUS
+    node_id = found[0]
+    node = index.nodes[node_id]
+    if is_folder(node):
+        print(f"Это папка: {args.path}", file=sys.stderr)
+        return EXIT_FAILED
+
+    value = entry_value(node)
+    if value is None:
+        print("Не удалось сгенерировать TOTP: неверный секрет", file=sys.stderr)
+        return EXIT_FAILED
+    if args.copy:
+        if not copy_value(value):
+            return EXIT_FAILED
+        # Копирование - такое же использование записи, как выбор в окне
+        from usage import UsageStore
+        UsageStore().record(node_id)
+        return 0
+    sys.stdout.write(value if args.no_newline else value + "\n")
+    return 0
+
+
+def command_serve(args):
+    """credmanager serve --stdio - отвечает на запросы JSON-строк, загрузив данные один раз"""
+    from query_server import VaultQueries, serve_stdio
+
+    data_file = args.file or vault_storage.get_data_file()
+    if not os.path.exists(data_file):
+        print(f"Нет файла данных: {data_file}", file=sys.stderr)
+        return EXIT_FAILED
+    journal = VaultJournal(data_file, read_only=True)
+    journal.load()
+    try:
+        serve_stdio(VaultQueries(journal))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def command_latency(args):
+    """credmanager latency - p50/p95/p99 задержки действий окна"""
+    import latency
+
+    path = latency.get_latency_file()
+    if args.reset:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        return 0
+    print(latency.report(path))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='credmanager', description="Учетные данные без окна")
+    commands = parser.add_subparsers(dest='command', required=True)
+    # Общие параметры команд (после имени команды, как в main.py)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--file', help="файл данных (по умолчанию ~/.credmanager/creds.json)")
+
+    get = commands.add_parser('get', parents=[common], help="значение записи по пути (для TOTP - текущий код)")
+    get.add_argument('path', help='путь через "/", например "Work/AWS/prod/password"')
+    get.add_argument('-c', '--copy', action='store_true', help="скопировать в буфер обмена вместо вывода")
+    get.add_argument('-n', '--no-newline', action='store_true', help="не добавлять перевод строки")
+    get.set_defaults(handler=command_get)
+
+    serve = commands.add_parser('serve', parents=[common],
+                                help="отвечать на запросы JSON-строк (get, list, totp, search)")
+    serve.add_argument('--stdio', action='store_true', required=True,
+                       help="запросы из stdin, ответы в stdout")
+    serve.set_defaults(handler=command_serve)
+
+    stats = commands.add_parser('latency', help="задержка действий окна (p50/p95/p99)")
+    stats.add_argument('--reset', action='store_true', help="удалить накопленные замеры")
+    stats.set_defaults(handler=command_latency)
+    return parser
+
+
+def main(argv):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
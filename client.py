@@ -0,0 +1,39 @@
+#client.py
+# Легкая точка входа для горячей клавиши: показывает окно уже запущенного
+# фонового процесса, а если его нет - запускает его.
+import os
+import sys
+
+from daemon import send_command, COMMAND_SHOW, COMMAND_STOP
+
+
+def start_daemon():
+    """Запускает фоновый процесс, который сразу покажет окно"""
+    import subprocess
+
+    if getattr(sys, 'frozen', False):
+        # В собранной программе фоновый процесс - это она же с флагом
+        command = [sys.executable, '--daemon', '--show']
+    else:
+        main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+        command = [sys.executable, main_script, '--daemon', '--show']
+    subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+
+
+def main(argv):
+    if '--stop' in argv:
+        return 0 if send_command(COMMAND_STOP) else 1
+
+    if not send_command(COMMAND_SHOW):
+        start_daemon()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
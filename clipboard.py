@@ -0,0 +1,140 @@
+#clipboard.py
+# Буфер обмена: внешняя утилита (wl-copy, xclip, xsel, pbcopy), которая
+# сама держит содержимое после выхода программы, или окно Tk программы
+# subprocess, shutil и platform импортируются при первом копировании:
+# модуль загружается при каждом запуске окна
+import os
+
+# Сколько ждать, пока утилита примет текст
+HELPER_TIMEOUT = 2.0
+
+
+def helper_commands(system=None, environ=None):
+    """Команды утилит буфера обмена, подходящие для текущей системы и сеанса"""
+    if system is None:
+        import platform
+        system = platform.system()
+    environ = os.environ if environ is None else environ
+    commands = []
+    if system == "Linux":
+        if environ.get('WAYLAND_DISPLAY'):
+            commands.append(['wl-copy'])
+        if environ.get('DISPLAY'):
+            commands.append(['xclip', '-selection', 'clipboard', '-in'])
+            commands.append(['xsel', '--clipboard', '--input'])
+    elif system == "Darwin":
+        commands.append(['pbcopy'])
+    return commands
+
+
+def find_helper():
+    """Первая установленная утилита буфера обмена или None"""
+    import shutil
+
+    for command in helper_commands():
+        path = shutil.which(command[0])
+        if path:
+            return [path] + command[1:]
+    return None
+
+
+class HelperBackend:
+    """Передает текст утилите, которая остается владельцем буфера после нашего выхода"""
+
+    persistent = True
+
+    def __init__(self, command):
+        self.command = command
+
+    def copy(self, text):
+        import subprocess
+
+        # Утилита уходит в фон сама; вывод не перехватываем, иначе run ждал бы ее фоновый процесс
+        subprocess.run(self.command, input=text.encode('utf-8'),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       timeout=HELPER_TIMEOUT, check=True, start_new_session=True)
+
+
+class PyperclipBackend:
+    """Буфер обмена Windows через pyperclip"""
+
+    persistent = True
+
+    def __init__(self, pyperclip):
+        self.pyperclip = pyperclip
+
+    def copy(self, text):
+        self.pyperclip.copy(text)
+
+
+class TkBackend:
+    """Буфер обмена главного окна Tk.
+
+    В X11 содержимое живет, пока живет окно, поэтому этот вариант
+    используется, только если утилиты буфера обмена нет.
+    """
+
+    def __init__(self, master):
+        import platform
+
+        self.master = master
+        self.persistent = platform.system() != "Linux"
+
+    def copy(self, text):
+        self.master.clipboard_clear()
+        self.master.clipboard_append(text)
+        self.master.update_idletasks()
+
+
+class Clipboard:
+    """Буфер обмена с выбором способа копирования при первом использовании"""
+
+    def __init__(self, master):
+        self.master = master
+        self.backend = None
+
+    def get_backend(self):
+        """Выбирает способ копирования один раз"""
+        if self.backend is None:
+            import platform
+
+            helper = find_helper()
+            if helper:
+                self.backend = HelperBackend(helper)
+            elif platform.system() == "Windows":
+                try:
+                    import pyperclip
+                    self.backend = PyperclipBackend(pyperclip)
+                except ImportError:
+                    self.backend = TkBackend(self.master)
+            else:
+                self.backend = TkBackend(self.master)
+        return self.backend
+
+    @property
+    def persistent(self):
+        """Останется ли скопированное в буфере после выхода программы"""
+        return self.get_backend().persistent
+
+    def copy(self, text):
+        """Копирует текст в буфер обмена, возвращает True при успехе"""
+        import subprocess
+
+        backend = self.get_backend()
+        try:
+            backend.copy(text)
+            return True
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Ошибка копирования через {type(backend).__name__}: {e}")
+        except Exception as e:
+            print(f"Ошибка копирования в буфер обмена: {e}")
+            return False
+
+        # Утилита не сработала - дальше копируем через окно
+        self.backend = TkBackend(self.master)
+        try:
+            self.backend.copy(text)
+            return True
+        except Exception as e:
+            print(f"Ошибка копирования в буфер обмена: {e}")
+            return False
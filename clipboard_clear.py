@@ -0,0 +1,202 @@
+#clipboard_clear.py
+# Отдельный процесс, который очищает буфер обмена через заданное время,
+# если в нем все еще лежит скопированное нами значение. Процесс один на
+# серию копирований: каждое новое копирование передает ему свое значение
+# и продлевает срок. Само значение процесс не получает - только его хэш
+import hashlib
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+from clipboard import HelperBackend, find_helper
+
+SOCKET_PATH = os.path.join(os.path.expanduser('~'), '.credmanager', 'clipboard.sock')
+
+# Через сколько секунд очищать буфер по умолчанию (0 - не очищать)
+DEFAULT_TTL = 30
+
+# Сколько ждать ответа уже запущенного процесса очистки
+CONNECT_TIMEOUT = 0.5
+
+# Утилиты чтения буфера обмена в том же порядке, что и утилиты записи
+PASTE_COMMANDS = {
+    'wl-copy': ['wl-paste', '--no-newline'],
+    'xclip': ['xclip', '-selection', 'clipboard', '-out'],
+    'xsel': ['xsel', '--clipboard', '--output'],
+    'pbcopy': ['pbpaste'],
+}
+
+
+def value_digest(text):
+    """Хэш значения, по которому процесс узнает его в буфере"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def send_request(message):
+    """Передает запрос работающему процессу очистки; False, если его нет"""
+    if not hasattr(socket, 'AF_UNIX'):
+        return False
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(CONNECT_TIMEOUT)
+    try:
+        client.connect(SOCKET_PATH)
+        client.sendall((message + "\n").encode('utf-8'))
+        return client.recv(16).startswith(b"ok")
+    except OSError:
+        return False
+    finally:
+        client.close()
+
+
+def helper_command():
+    """Команда запуска процесса очистки"""
+    if getattr(sys, 'frozen', False):
+        # В собранной программе процесс очистки - это она же с флагом
+        return [sys.executable, '--clear-clipboard']
+    return [sys.executable, os.path.abspath(__file__)]
+
+
+def schedule_clear(text, ttl=DEFAULT_TTL):
+    """Просит очистить буфер через ttl секунд, если там останется text.
+
+    Не ждет ничего, кроме передачи запроса: работающий процесс очистки
+    продлевает срок, иначе запускается новый, независимый от программы.
+    """
+    message = json.dumps({'digest': value_digest(text), 'ttl': ttl})
+    if send_request(message):
+        return True
+    try:
+        options = {}
+        if os.name == 'nt':
+            options['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            options['start_new_session'] = True
+        # Запрос передается через stdin, чтобы хэш не был виден в списке процессов
+        process = subprocess.Popen(helper_command(), stdin=subprocess.PIPE,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **options)
+        process.stdin.write((message + "\n").encode('utf-8'))
+        process.stdin.close()
+        return True
+    except OSError as e:
+        print(f"Не удалось запустить очистку буфера обмена: {e}")
+        return False
+
+
+def read_clipboard():
+    """Текущее содержимое буфера обмена или None, если его не прочитать"""
+    helper = find_helper()
+    if helper:
+        command = PASTE_COMMANDS.get(os.path.basename(helper[0]))
+        if command and shutil.which(command[0]):
+            try:
+                result = subprocess.run(command, capture_output=True, timeout=2.0)
+                return result.stdout.decode('utf-8', 'replace')
+            except (OSError, subprocess.SubprocessError):
+                return None
+
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    try:
+        root.withdraw()
+        return root.clipboard_get()
+    except tk.TclError:
+        # Буфер пуст или в нем не текст
+        return None
+    finally:
+        root.destroy()
+
+
+def clear_clipboard():
+    """Очищает буфер обмена"""
+    helper = find_helper()
+    if helper:
+        try:
+            HelperBackend(helper).copy("")
+            return
+        except (OSError, subprocess.SubprocessError):
+            pass
+
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return
+    root.withdraw()
+    root.clipboard_clear()
+    root.update()
+    root.destroy()
+
+
+def open_server():
+    """Создает сокет процесса очистки (доступен только владельцу)"""
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    from daemon import open_unix_server
+    return open_unix_server(SOCKET_PATH)
+
+
+def run(message):
+    """Ждет истечения срока (продлеваемого новыми запросами) и очищает буфер"""
+    request = json.loads(message)
+    # Процесс уже работает (запустились одновременно) - передаем запрос ему
+    if send_request(message):
+        return
+
+    digest = request['digest']
+    deadline = time.monotonic() + request['ttl']
+    try:
+        server = open_server()
+    except OSError:
+        # Другой процесс очистки успел создать сокет - передаем запрос ему
+        if send_request(message):
+            return
+        server = None
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if server is None:
+                time.sleep(remaining)
+                continue
+            server.settimeout(remaining)
+            try:
+                connection, _ = server.accept()
+            except socket.timeout:
+                continue
+            with connection:
+                try:
+                    connection.settimeout(CONNECT_TIMEOUT)
+                    request = json.loads(connection.makefile('rb').readline())
+                    digest = request['digest']
+                    deadline = time.monotonic() + request['ttl']
+                    connection.sendall(b"ok\n")
+                except (OSError, ValueError, KeyError):
+                    continue
+    finally:
+        if server is not None:
+            from daemon import close_unix_server
+            close_unix_server(server, SOCKET_PATH)
+
+    current = read_clipboard()
+    if current is not None and value_digest(current) == digest:
+        clear_clipboard()
+
+
+def main():
+    line = sys.stdin.readline()
+    if not line:
+        return 1
+    run(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#daemon.py
+import errno
+import os
+import socket
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: проверка и создание сокета не защищены от одновременного запуска
+    fcntl = None
+
+SOCKET_PATH = os.path.join(os.path.expanduser('~'), '.credmanager', 'daemon.sock')
+
+# Команды, которые понимает фоновый процесс
+COMMAND_SHOW = "show"
+COMMAND_STOP = "stop"
+
+
+def socket_alive(path, timeout=0.5):
+    """Проверяет, принимает ли кто-то подключения на сокете path"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    probe.settimeout(timeout)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+@contextmanager
+def socket_path_locked(path):
+    """Не дает двум процессам одновременно проверять и создавать сокет path (flock)"""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Закрытие снимает блокировку
+        os.close(fd)
+
+
+def open_unix_server(path, backlog=8):
+    """Создает слушающий Unix-сокет, доступный только владельцу.
+
+    Файл сокета, оставшийся от аварийно завершенного процесса, заменяется.
+    Если сокет слушает другой процесс, вызывается OSError (EADDRINUSE):
+    при одновременном запуске второй процесс не отнимает сокет у первого.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with socket_path_locked(path):
+        if os.path.exists(path):
+            if socket_alive(path):
+                raise OSError(errno.EADDRINUSE, "Сокет уже используется", path)
+            os.unlink(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o077)
+        try:
+            server.bind(path)
+            os.chmod(path, 0o600)
+            server.listen(backlog)
+        except OSError:
+            server.close()
+            raise
+        finally:
+            os.umask(old_umask)
+    return server
+
+
+def close_unix_server(server, path):
+    """Удаляет файл сокета и закрывает сокет.
+
+    Файл удаляется под той же блокировкой, что и в open_unix_server, пока
+    сокет еще слушает: новый процесс не может в это время счесть его
+    оставшимся и занять путь, а этот процесс - удалить чужой сокет.
+    """
+    with socket_path_locked(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        try:
+            # Будит поток, ждущий в accept (API)
+            server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        server.close()
+
+
+def send_command(command, timeout=1.0):
+    """Отправляет команду работающему фоновому процессу.
+
+    Возвращает True, если процесс принял команду, и False, если он не запущен.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(SOCKET_PATH)
+        client.sendall((command + "\n").encode('utf-8'))
+        return client.recv(16).startswith(b"ok")
+    except OSError:
+        return False
+    finally:
+        client.close()
+
+
+class DaemonListener:
+    """Слушает Unix-сокет внутри цикла событий Tk без отдельных потоков"""
+
+    def __init__(self, master, handler):
+        self.master = master
+        self.handler = handler
+        self.server = None
+
+    def start(self):
+        """Создает сокет и регистрирует его в цикле событий Tk.
+
+        Возвращает False, если фоновый процесс уже запущен.
+        """
+        if send_command("ping"):
+            return False
+
+        try:
+            self.server = open_unix_server(SOCKET_PATH)
+        except OSError as e:
+            if e.errno == errno.EADDRINUSE:
+                # Другой фоновый процесс запустился одновременно с этим
+                return False
+            raise
+        self.server.setblocking(False)
+
+        import tkinter as tk
+        self.master.tk.createfilehandler(self.server, tk.READABLE, self.on_readable)
+        return True
+
+    def stop(self):
+        """Закрывает сокет и удаляет его файл"""
+        if self.server is None:
+            return
+        try:
+            self.master.tk.deletefilehandler(self.server)
+        except Exception:
+            pass
+        server, self.server = self.server, None
+        close_unix_server(server, SOCKET_PATH)
+
+    def on_readable(self, fileobj, mask):
+        """Принимает подключение клиента и передает команду обработчику"""
+        try:
+            connection, _ = self.server.accept()
+        except OSError:
+            return
+
+        with connection:
+            connection.settimeout(0.5)
+            try:
+                command = connection.recv(64).decode('utf-8', 'replace').strip()
+                connection.sendall(b"ok\n")
+            except OSError:
+                return
+
+        if command and command != "ping":
+            self.handler(command)
+
+
+class TkCaller:
+    """Выполняет функции в потоке Tk по просьбе других потоков.
+
+    Поток кладет функцию в очередь и будит цикл событий Tk записью в
+    канал, поэтому Tk ничего не опрашивает и ни на чем не блокируется.
+    """
+
+    def __init__(self, master):
+        import queue
+        import tkinter as tk
+
+        self.master = master
+        self.calls = queue.Queue()
+        self.read_fd, self.write_fd = os.pipe()
+        os.set_blocking(self.read_fd, False)
+        master.tk.createfilehandler(self.read_fd, tk.READABLE, self.on_readable)
+
+    def call(self, function, timeout=2.0):
+        """Просит выполнить function в потоке Tk и ждет ее завершения.
+
+        Возвращает False, если Tk не успел за timeout секунд.
+        """
+        import threading
+
+        done = threading.Event()
+        self.calls.put((function, done))
+        os.write(self.write_fd, b"x")
+        return done.wait(timeout)
+
+    def on_readable(self, fileobj, mask):
+        """Выполняет накопившиеся функции"""
+        try:
+            os.read(self.read_fd, 512)
+        except BlockingIOError:
+            pass
+        while not self.calls.empty():
+            function, done = self.calls.get_nowait()
+            try:
+                function()
+            except Exception as e:
+                print(f"Ошибка в вызове из другого потока: {e}")
+            finally:
+                done.set()
+
+    def close(self):
+        """Снимает обработчик и закрывает канал"""
+        try:
+            self.master.tk.deletefilehandler(self.read_fd)
+        except Exception:
+            pass
+        os.close(self.read_fd)
+        os.close(self.write_fd)
@@ -0,0 +1,157 @@
+#latency.py
+# Гистограммы задержки действий окна (навигация, копирование, правки):
+# фиксированное число логарифмических корзин на действие в памяти,
+# слияние с двоичным файлом при выходе и отчет p50/p95/p99
+import math
+import os
+import struct
+import time
+from contextlib import contextmanager
+
+import vault_storage
+
+# Первые байты latency.bin; цифра меняется вместе с числом или шириной корзин
+MAGIC = b"CML1"
+
+# Корзины: верхняя граница i-й - SMALLEST_MS * 2 ** (i / STEPS_PER_DOUBLING),
+# последняя собирает все, что дольше (от 0.05 мс до ~50 с с шагом ~19%)
+SMALLEST_MS = 0.05
+STEPS_PER_DOUBLING = 4
+BUCKETS = 81
+
+# Действие в файле: длина имени, имя и счетчики корзин
+NAME_LENGTH = struct.Struct("<B")
+COUNTS = struct.Struct(f"<{BUCKETS}I")
+
+PERCENTILES = (50, 95, 99)
+
+
+def get_latency_file():
+    """Путь к файлу гистограмм задержки"""
+    return os.path.join(os.path.expanduser('~'), '.credmanager', 'latency.bin')
+
+
+def bucket_index(milliseconds):
+    """Номер корзины для длительности в миллисекундах"""
+    if milliseconds <= SMALLEST_MS:
+        return 0
+    index = math.ceil(math.log2(milliseconds / SMALLEST_MS) * STEPS_PER_DOUBLING)
+    return min(index, BUCKETS - 1)
+
+
+def bucket_bound(index):
+    """Верхняя граница корзины в миллисекундах"""
+    return SMALLEST_MS * 2 ** (index / STEPS_PER_DOUBLING)
+
+
+def percentile(counts, percent):
+    """Верхняя граница корзины, в которую попадает процентиль, или None"""
+    total = sum(counts)
+    if not total:
+        return None
+    threshold = total * percent / 100.0
+    seen = 0
+    for index, count in enumerate(counts):
+        seen += count
+        if seen >= threshold:
+            return bucket_bound(index)
+    return bucket_bound(BUCKETS - 1)
+
+
+def read_histograms(path):
+    """Гистограммы из файла: действие -> список счетчиков"""
+    try:
+        with open(path, 'rb') as f:
+            blob = f.read()
+    except OSError:
+        return {}
+    histograms = {}
+    offset = len(MAGIC)
+    try:
+        if not blob.startswith(MAGIC):
+            raise ValueError("нет сигнатуры")
+        while offset < len(blob):
+            (length,) = NAME_LENGTH.unpack_from(blob, offset)
+            offset += NAME_LENGTH.size
+            name = blob[offset:offset + length].decode('utf-8')
+            offset += length
+            histograms[name] = list(COUNTS.unpack_from(blob, offset))
+            offset += COUNTS.size
+    except (struct.error, ValueError) as e:
+        # UnicodeDecodeError - тоже ValueError
+        print(f"Не удалось разобрать {path} ({e}), прежние замеры отброшены")
+        return {}
+    return histograms
+
+
+class LatencyStats:
+    """Гистограммы задержки действий, накопленные за время работы программы"""
+
+    def __init__(self, path=None):
+        self.path = path or get_latency_file()
+        # действие -> счетчики корзин с последней записи в файл
+        self.histograms = {}
+        # Действия, которые выполняются сейчас: действие -> время начала
+        self.running = {}
+
+    @contextmanager
+    def measure(self, action):
+        """Замеряет выполнение блока как действие action"""
+        self.running[action] = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stop(action)
+
+    def stop(self, action):
+        """Завершает замер действия (если он еще не завершен)"""
+        started = self.running.pop(action, None)
+        if started is not None:
+            self.record(action, time.perf_counter() - started)
+
+    def record(self, action, seconds):
+        """Добавляет длительность действия в его гистограмму"""
+        counts = self.histograms.get(action)
+        if counts is None:
+            counts = self.histograms[action] = [0] * BUCKETS
+        counts[bucket_index(seconds * 1000.0)] += 1
+
+    def flush(self):
+        """Добавляет накопленное к файлу и начинает накопление заново.
+
+        Действия, которые еще выполняются (выход из программы посреди
+        копирования), засчитываются по текущий момент.
+        """
+        for action in list(self.running):
+            self.stop(action)
+        if not self.histograms:
+            return
+        merged = read_histograms(self.path)
+        for action, counts in self.histograms.items():
+            total = merged.setdefault(action, [0] * BUCKETS)
+            for index, count in enumerate(counts):
+                total[index] = min(total[index] + count, 0xFFFFFFFF)
+
+        parts = [MAGIC]
+        for action, counts in merged.items():
+            name = action.encode('utf-8')[:255]
+            parts.append(NAME_LENGTH.pack(len(name)) + name + COUNTS.pack(*counts))
+        try:
+            vault_storage.atomic_write_private(self.path, b"".join(parts))
+        except OSError as e:
+            print(f"Ошибка сохранения гистограмм задержки: {e}")
+            return
+        self.histograms = {}
+
+
+def report(path=None):
+    """Текст отчета: число замеров и p50/p95/p99 по каждому действию"""
+    histograms = read_histograms(path or get_latency_file())
+    if not histograms:
+        return "Замеров задержки пока нет"
+    header = f"{'действие':24} {'замеров':>8}" + "".join(f" {'p' + str(p) + ', мс':>11}" for p in PERCENTILES)
+    lines = [header]
+    for action, counts in sorted(histograms.items()):
+        values = "".join(f" {percentile(counts, p):11.2f}" for p in PERCENTILES)
+        lines.append(f"{action:24} {sum(counts):8}{values}")
+    return "\n".join(lines)
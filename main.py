@@ -1,76 +1,129 @@
 # main.py
+import sys
+import time
+
+# Начало запуска - от него отсчитываются этапы при замере (см. startup_profile)
+STARTED_AT = time.perf_counter()
+
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] in ('get', 'serve', 'latency'):
+    # Команды для скриптов (credmanager get/serve/latency ...) работают без окна и без tkinter
+    import cli
+    sys.exit(cli.main(sys.argv[1:]))
+
+if __name__ == "__main__" and '--clear-clipboard' in sys.argv:
+    # Процесс очистки буфера в собранной программе (см. clipboard_clear.helper_command)
+    # запускается при каждом копировании - без tkinter и модулей окна
+    import clipboard_clear
+    sys.exit(clipboard_clear.main())
+
+if __name__ == "__main__" and '--daemon' not in sys.argv and ('--show' in sys.argv or '--stop' in sys.argv):
+    # Клиент фонового процесса для горячей клавиши (как client.py) - тоже без tkinter
+    import client
+    sys.exit(client.main(sys.argv[1:]))
+
+import startup_profile
+# Профилировщик (если включен) запускается до импорта остальных модулей
+startup = startup_profile.from_environment(STARTED_AT) if __name__ == "__main__" else None
+
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
-import json
+import functools
 import os
-import webbrowser
-import pyotp
-import time
-import sys
-import threading
-import platform
 
-# Импортируем SettingsDialog из отдельного файла
-from settings_dialog import SettingsDialog
+import vault_storage
+from vault_journal import VaultJournal
+from vault_index import new_node_id, is_folder
+from search_index import SearchIndex
+from usage import UsageStore
+from tree_rows import TreeRows
+from totp import TotpEngine, seconds_remaining
+from clipboard import Clipboard
+from state_store import StateStore
+from latency import LatencyStats
+
+# webbrowser, threading, subprocess, очистка буфера и окно настроек импортируются лениво:
+# большинство запусков только копирует пароль и не должно платить за них
+
+# Сколько часто используемых записей показывать в начале корневой папки
+FREQUENT_COUNT = 5
+
+# Префикс id строк с часто используемыми записями (сама запись лежит в своей папке)
+FREQUENT_PREFIX = "freq:"
+
+# Переменная окружения, включающая вывод задержки от нажатия до выхода
+TIMING_ENV = "CREDMANAGER_TIMING"
+
+# Как часто проверять, держит ли еще окно буфер обмена, и сколько держать его
+# не дольше, если автоочистка выключена
+CLIPBOARD_POLL_MS = 250
+CLIPBOARD_HOLD_LIMIT = 60
+
+def timed_action(action):
+    """Декоратор: время выполнения метода попадает в гистограмму действия action"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.latency.measure(action):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
 
-class ClipboardManager:
-    """Универсальный менеджер буфера обмена для всех платформ"""
-    
-    @staticmethod
-    def copy_to_clipboard(text):
-        """Копирует текст в буфер обмена с учетом платформы"""
-        try:
-            # Для Windows используем pyperclip если доступен, иначе fallback на Tkinter
-            if platform.system() == "Windows":
-                try:
-                    import pyperclip
-                    pyperclip.copy(text)
-                    return True
-                except ImportError:
-                    # Fallback для Windows без pyperclip
-                    root = tk.Tk()
-                    root.withdraw()
-                    root.clipboard_clear()
-                    root.clipboard_append(text)
-                    root.update()
-                    root.destroy()
-                    return True
-            else:
-                # Для Linux и macOS используем Tkinter
-                root = tk.Tk()
-                root.withdraw()
-                root.clipboard_clear()
-                root.clipboard_append(text)
-                root.update()
-                # Для Linux нужно держать окно открытым немного дольше
-                if platform.system() == "Linux":
-                    root.after(100, root.destroy)
-                else:
-                    root.destroy()
-                return True
-        except Exception as e:
-            print(f"Ошибка копирования в буфер обмена: {e}")
-            return False
 
 class CredentialsTable:
-    def __init__(self, master):
+    def __init__(self, master, daemon=False, startup=None):
         self.master = master
+        # В фоновом режиме окно прячется вместо завершения процесса
+        self.daemon = daemon
+        # Замер этапов запуска (None - выключен)
+        self.startup = startup
         master.title("Credentials Table")
         master.geometry("600x600")
 
+        # Путь навигации - id папок от корня до текущей
         self.root = []
+        self.restored_id = None
+        self.restored_index = 0
         
         # Используем относительный путь
-        self.data_file = os.path.join(os.path.expanduser('~'), '.credmanager', 'creds.json')
+        self.data_file = vault_storage.get_data_file()
         self.state_file = os.path.join(os.path.expanduser('~'), '.credmanager', 'state.json')
+        # Настройки и позиция читаются из файла состояния один раз
+        self.state = StateStore(self.state_file)
+        self.mark_startup("файл состояния")
+        self.journal = None
+        # Запросы локального API фонового процесса (см. start_api)
+        self.queries = None
+        self.api = None
+        self.tk_caller = None
+        # Файл изменили извне при открытом окне - перечитать при скрытии
+        self.reload_pending = False
+        # Поиск по всем папкам: индекс строится при первом поиске
+        self.search_index = None
+        self.search_active = False
+        self.search_origin = None
+        # Статистика использования для списка частых записей и ранжирования поиска
+        self.usage = UsageStore()
+        self.frequent_ids = []
+        # Коды TOTP: секреты декодируются один раз, коды кэшируются на шаг времени
+        self.totp = TotpEngine()
+        # Буфер обмена через главное окно или внешнюю утилиту, без отдельного Tk
+        self.clipboard = Clipboard(master)
+        # Время последнего нажатия и этапы его обработки (для замера задержки выхода)
+        self.key_time = None
+        self.timing_marks = []
+        self.clipboard_hold_until = 0.0
+        # Гистограммы задержки действий, записываются в файл при выходе
+        self.latency = LatencyStats()
         self.data = self.read_json_file()
-        self.parsed_data = []
+        self.mark_startup("read_json_file")
         
         # Загружаем настройки
         self.settings = self.load_settings()
+        self.mark_startup("load_settings")
         
         # Восстанавливаем состояние
         self.restore_state()
+        self.mark_startup("restore_state")
         
         # Создаем фрейм для кнопок
         self.button_frame = tk.Frame(master)
@@ -138,9 +191,29 @@ class CredentialsTable:
         self.tree.column("#0", width=200)
         self.tree.column("value", width=350)
         self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # Перерисовка меняет только изменившиеся строки
+        self.tree_rows = TreeRows(self.tree)
+        # В больших папках прокрутка сдвигает окно строк
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self.on_tree_scroll)
+        self.tree.bind('<Configure>', lambda event: self.tree_rows.refresh())
+
+        # Строка поиска появляется над списком по "/" или Ctrl+F
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add('write', lambda *args: self.update_search_results())
+        self.search_entry = tk.Entry(master, textvariable=self.search_var, font=("Arial", 12))
+        self.mark_startup("виджеты")
 
         self.draw()
         self.select_restored_item()
+        self.mark_startup("первый draw")
+        if self.startup is not None:
+            # Отчет выводится, когда список впервые нарисован на экране
+            self.tree.bind('<Expose>', lambda event: self.startup.finish(), '+')
+
+        # Один таймер на все окно обновляет видимые TOTP-коды
+        self.totp_tick_id = None
+        self.schedule_totp_tick()
         
         # Биндим горячие клавиши
         self.bind_hotkeys()
@@ -150,8 +223,14 @@ class CredentialsTable:
 
     def copy_to_clipboard_safe(self, text):
         """Безопасное копирование в буфер обмена с обработкой ошибок"""
-        success = ClipboardManager.copy_to_clipboard(text)
+        success = self.clipboard.copy(text)
+        self.mark_timing("буфер обмена")
         if success:
+            # Отдельный процесс очистит буфер через заданное время, если значение еще там
+            ttl = self.settings.get('clipboard_ttl', 30)
+            if ttl > 0 and text:
+                import clipboard_clear
+                clipboard_clear.schedule_clear(text, ttl)
             # Показываем уведомление о успешном копировании
             self.show_copy_notification()
         else:
@@ -168,121 +247,199 @@ class CredentialsTable:
         # Убираем уведомление через 1.5 секунды
         self.master.after(1500, notification.destroy)
 
-    def refresh_data(self):
-        """Обновляет данные из файла и перерисовывает интерфейс"""
-        self.data = self.read_json_file()
+    def handle_daemon_command(self, command):
+        """Обрабатывает команду, пришедшую фоновому процессу"""
+        if command == "show":
+            self.show_window()
+        elif command == "stop":
+            self.daemon = False
+            self.quit_application()
+
+    def start_api(self):
+        """Запускает локальный API на Unix-сокете по тем же данным, что и окно"""
+        from api_server import ApiServer
+        from daemon import TkCaller
+        from query_server import VaultQueries
+
+        self.tk_caller = TkCaller(self.master)
+        self.queries = VaultQueries(self.journal, reload=self.reload_for_api)
+        self.api = ApiServer(self.queries)
+        if not self.api.start():
+            self.api = None
+
+    def stop_api(self):
+        """Останавливает локальный API"""
+        if self.api is not None:
+            self.api.stop()
+            self.api = None
+        if self.tk_caller is not None:
+            self.tk_caller.close()
+            self.tk_caller = None
+
+    def reload_for_api(self, journal):
+        """Вызывается из потока API, когда файл данных изменили извне.
+
+        Данные перечитываются в потоке Tk, а поток API ждет результата.
+        Если перечитывание уже отложено до скрытия окна, поток Tk не
+        беспокоится: запрос сразу получает прежние данные.
+        """
+        if self.reload_pending:
+            return
+        self.tk_caller.call(self.reload_hidden)
+
+    def reload_hidden(self):
+        """Перечитывает измененный извне файл, пока окно спрятано.
+
+        В открытом окне данные не подменяются под пользователем: они
+        перечитываются при скрытии или следующем показе окна.
+        """
+        if not self.journal.changed_externally():
+            return
+        if self.master.state() == 'withdrawn':
+            self.data = self.read_json_file()
+        else:
+            self.reload_pending = True
+
+    def show_window(self):
+        """Показывает спрятанное окно в восстановленной папке"""
+        # Файл могли изменить извне, пока окно было спрятано
+        self.reload_pending = False
+        if self.journal.changed_externally():
+            self.data = self.read_json_file()
+
+        self.restore_state()
         self.draw()
-        self.select_first_item()
+        self.select_restored_item()
+
+        self.master.deiconify()
+        self.master.lift()
+        self.master.attributes('-topmost', True)
+        self.master.after_idle(self.master.attributes, '-topmost', False)
+        self.master.focus_force()
+
+    def hide_window(self):
+        """Прячет окно, оставляя процесс и данные в памяти"""
+        if self.search_active:
+            self.search_active = False
+            self.search_entry.pack_forget()
+        self.master.withdraw()
+        if self.reload_pending:
+            # Перечитывание, отложенное, пока окно было открыто
+            self.reload_pending = False
+            self.reload_hidden()
 
     def load_settings(self):
         """Загружает настройки из файла состояния"""
         default_settings = {
             'save_position': True,
-            'restore_timeout': 60
+            'restore_timeout': 60,
+            'clipboard_ttl': 30
         }
-        
-        try:
-            if os.path.exists(self.state_file):
-                with open(self.state_file, 'r') as f:
-                    state_data = json.load(f)
-                    settings = state_data.get('settings', {})
-                    return {**default_settings, **settings}
-        except Exception as e:
-            print(f"Ошибка загрузки настроек: {e}")
-        
-        return default_settings
+        return self.state.settings(default_settings)
 
     def save_settings(self, new_settings=None):
         """Сохраняет настройки в файл состояния"""
-        try:
-            if new_settings is not None:
-                self.settings = new_settings
-            
-            state_data = {}
-            if os.path.exists(self.state_file):
-                with open(self.state_file, 'r') as f:
-                    state_data = json.load(f)
-            
-            state_data['settings'] = self.settings
-            
-            with open(self.state_file, 'w') as f:
-                json.dump(state_data, f, indent=2)
-                
-        except Exception as e:
-            print(f"Ошибка сохранения настроек: {e}")
+        if new_settings is not None:
+            self.settings = new_settings
+        self.state.set_settings(self.settings)
+        self.state.save()
 
     def save_state(self):
         """Сохраняет текущее состояние программы"""
         if not self.settings.get('save_position', True):
             return
-            
-        state = {
-            'root': self.root,
-            'timestamp': time.time(),
-            'selected_index': self.get_selected_index(),
-            'settings': self.settings
-        }
-        
-        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
-        
-        with open(self.state_file, 'w') as f:
-            json.dump(state, f, indent=2)
+
+        self.remember_cursor()
+        self.state.set_position(self.root, self.get_selected_id(), self.get_selected_index())
+        # Файл перезаписывается, только если позиция изменилась
+        self.state.save(touch=True)
+        self.mark_timing("состояние")
 
     def restore_state(self):
         """Восстанавливает состояние программы из файла"""
-        try:
-            if not os.path.exists(self.state_file):
-                return
-                
-            with open(self.state_file, 'r') as f:
-                state = json.load(f)
-                
-            if not self.settings.get('save_position', True):
-                self.root = []
-                self.restored_index = 0
-                return
-                
-            current_time = time.time()
-            saved_time = state.get('timestamp', 0)
-            timeout = self.settings.get('restore_timeout', 60)
-            
-            if current_time - saved_time <= timeout:
-                self.root = state.get('root', [])
-                self.restored_index = state.get('selected_index', 0)
-            else:
-                self.root = []
-                self.restored_index = 0
-                
-        except Exception as e:
-            print(f"Ошибка восстановления состояния: {e}")
-            self.root = []
-            self.restored_index = 0
+        self.root = []
+        self.restored_id = None
+        self.restored_index = 0
+        if not self.settings.get('save_position', True):
+            return
+
+        position, saved_time = self.state.position()
+        timeout = self.settings.get('restore_timeout', 60)
+        if time.time() - saved_time <= timeout:
+            # Позиция хранится по id, поэтому переживает перестановки записей
+            self.root = self.get_folder_path(position['folder_ids'] or [])
+            self.restored_id = position['selected_id']
+            self.restored_index = position['selected_index'] or 0
+
+    def remember_cursor(self):
+        """Запоминает выбранную строку текущей папки"""
+        selected_id = self.get_selected_id()
+        if selected_id and not self.search_active:
+            self.state.remember_cursor(self.get_current_folder_id(), selected_id)
+
+    def select_remembered_item(self):
+        """Выбирает последнюю выбранную в этой папке строку или первую"""
+        if not self.select_item(self.state.cursor(self.get_current_folder_id())):
+            self.select_first_item()
+
+    def get_folder_path(self, folder_ids):
+        """Путь из id папок до последней существующей папки из сохраненного пути"""
+        index = self.journal.index
+        for folder_id in reversed(folder_ids):
+            if folder_id in index and is_folder(index.nodes[folder_id]):
+                return index.ancestors(folder_id) + [folder_id]
+        return []
 
+    @timed_action('open_settings')
     def open_settings(self):
         """Открывает окно настроек"""
-        def on_settings_closed():
-            # При закрытии настроек обновляем данные
-            self.refresh_data()
-    
-        SettingsDialog(self.master, self.settings, self.save_settings, self.data)
+        from settings_dialog import SettingsDialog
+
+        def on_settings_closed(event):
+            # <Destroy> приходит и от каждого виджета внутри окна настроек
+            if event.widget is not dialog:
+                return
+            # Импорт и структура меняют данные на месте - строки дерева
+            # приводятся к индексу, иначе они ссылаются на исчезнувшие id
+            self.draw()
+            if not self.get_selected_id():
+                self.select_first_item()
+
+        dialog = SettingsDialog(self.master, self.settings, self.save_settings, self.data, self.save_json_file)
+        dialog.bind('<Destroy>', on_settings_closed, add='+')
 
     def get_selected_index(self):
         """Получает индекс выбранного элемента"""
-        selection = self.tree.selection()
-        if selection:
-            return self.tree.index(selection[0])
+        selected_id = self.get_selected_id()
+        if selected_id in self.tree_rows:
+            return self.tree_rows.index(selected_id)
         return 0
 
+    def get_selected_id(self):
+        """Получает id выбранной записи (строки дерева совпадают с id записей)"""
+        # В большой папке выбранная строка может быть прокручена за пределы окна
+        return self.tree_rows.selection()
+
+    def get_selected_node_id(self):
+        """id записи выбранной строки, в том числе строки из списка частых"""
+        item_id = self.get_selected_id()
+        if item_id and item_id.startswith(FREQUENT_PREFIX):
+            return item_id[len(FREQUENT_PREFIX):]
+        return item_id
+
+    def select_item(self, item_id):
+        """Выбирает строку дерева по id записи"""
+        return self.tree_rows.select(item_id)
+
     def select_restored_item(self):
         """Выбирает сохраненный элемент или первый элемент"""
+        if self.select_item(self.restored_id):
+            return
         try:
-            children = self.tree.get_children()
+            children = self.tree_rows.ids()
             if children:
                 index = min(self.restored_index, len(children) - 1)
-                item_to_select = children[index]
-                self.tree.selection_set(item_to_select)
-                self.tree.focus(item_to_select)
-                self.tree.see(item_to_select)
+                self.select_item(children[index])
         except (AttributeError, IndexError):
             self.select_first_item()
 
@@ -299,11 +456,23 @@ class CredentialsTable:
     def bind_hotkeys(self):
         """Единый обработчик с проверкой keycode"""
         self.master.bind('<Key>', self.universal_key_handler)
+        self.master.bind('<Control-f>', lambda event: self.start_search())
     
     def universal_key_handler(self, event):
         """Универсальный обработчик для обеих раскладок"""
+        # Отсчет задержки до выхода начинается с нажатия
+        self.key_time = time.perf_counter()
+        self.timing_marks = []
+
+        if self.search_active:
+            # Во время поиска буквы идут в строку поиска
+            self.search_key_handler(event)
+            return
+
         # Проверяем keycode (физическая клавиша)
-        if event.char == 'n' or event.char == 'т':  # Клавиша N/Т
+        if event.char == '/' or event.char == '.':  # Клавиша / (в русской раскладке ".")
+            self.start_search()
+        elif event.char == 'n' or event.char == 'т':  # Клавиша N/Т
             self.add_new_record()
         elif event.char == 'e' or event.char == 'у':  # Клавиша E/У
             self.edit_selected_record()
@@ -328,256 +497,374 @@ class CredentialsTable:
         elif event.keysym in ['Return', 'KP_Enter']:
             self.navigate_right()
 
+    def search_key_handler(self, event):
+        """Клавиши в режиме поиска: стрелки, Enter и Esc"""
+        if event.keysym in ['Up', 'Down']:
+            self.navigate_up_down(event)
+        elif event.keysym in ['Return', 'KP_Enter']:
+            self.open_search_result()
+        elif event.keysym == 'Escape':
+            self.stop_search()
+
+    def get_search_index(self):
+        """Поисковый индекс текущих данных (строится при первом обращении)"""
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.journal.index)
+        return self.search_index
+
+    def start_search(self):
+        """Показывает строку поиска по всем папкам"""
+        if self.search_active:
+            self.search_entry.focus_set()
+            return
+        self.remember_cursor()
+        self.search_active = True
+        self.search_origin = self.get_selected_id()
+        self.get_search_index()
+        self.search_entry.pack(fill=tk.X, padx=5, before=self.tree)
+        self.search_entry.focus_set()
+        self.search_var.set("")
+        self.update_search_results()
+
+    def stop_search(self):
+        """Прячет строку поиска и возвращает текущую папку"""
+        self.search_active = False
+        self.search_entry.pack_forget()
+        # Фокус возвращается окну, как до поиска: у Treeview свои привязки
+        # стрелок, и с ними каждое нажатие сдвигало бы выбор на две строки
+        self.master.focus_set()
+        self.draw()
+        if not self.select_item(self.search_origin):
+            self.select_first_item()
+
+    def update_search_results(self):
+        """Показывает найденные записи из всех папок с путем к ним"""
+        if not self.search_active:
+            return
+        search_index = self.get_search_index()
+        scores = self.usage.scores()
+        self.tree_rows.show([(node_id, self.journal.index.name(node_id), search_index.path(node_id) or "/")
+                             for node_id in search_index.search(self.search_var.get(), scores=scores)], str)
+        self.select_first_item()
+
+    def redraw(self):
+        """Перерисовывает то, что показано: результаты поиска или текущую папку"""
+        if self.search_active:
+            self.update_search_results()
+        else:
+            self.draw()
+
+    def leave_search(self, node_id):
+        """Закрывает поиск, переходя в папку, где лежит запись"""
+        self.search_active = False
+        self.search_entry.pack_forget()
+        self.master.focus_set()
+        self.root = self.journal.index.ancestors(node_id)
+
+    def open_search_result(self):
+        """Открывает папку или выполняет действие для найденной записи"""
+        node_id = self.get_selected_id()
+        index = self.journal.index
+        if node_id not in index:
+            return
+        value = index.nodes[node_id]
+        # Состояние запомнит папку найденной записи
+        self.leave_search(node_id)
+        if is_folder(value):
+            self.root.append(node_id)
+            self.draw()
+            self.select_remembered_item()
+        else:
+            self.draw()
+            self.select_item(node_id)
+            self.handle_value_action(value, index.name(node_id))
+
     def read_json_file(self):
         """Чтение JSON файла"""
+        self.search_index = None
+        if self.journal is not None:
+            self.journal.close()
+        journal = VaultJournal(self.data_file, self.convert_to_unified_format)
+
         if not os.path.exists(self.data_file):
             os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            with open(self.data_file, 'w') as f:
-                json.dump([], f)
-            return []
-        
-        with open(self.data_file, 'r') as f:
-            data = json.load(f)
-            # Конвертируем старые данные в единый формат
-            return self.convert_to_unified_format(data)
+            vault_storage.write_vault(self.data_file, [])
+        
+        # Старые данные конвертируются в единый формат один раз и сохраняются
+        # с заголовком версии; при неизменном файле снимок берется из кэша,
+        # после чего применяются операции из журнала изменений
+        data = journal.load()
+        self.journal = journal
+        if self.queries is not None:
+            # Запросы API переходят на новые данные целиком
+            self.queries.journal = journal
+        return data
 
     def convert_to_unified_format(self, data):
         """Конвертирует данные в единый формат"""
-        if isinstance(data, list):
-            converted_data = []
-            for item in data:
-                if isinstance(item, dict):
-                    converted_item = {}
-                    for key, value in item.items():
-                        converted_item[key] = self.convert_value_to_unified_format(value)
-                    converted_data.append(converted_item)
-            return converted_data
+        if self.startup is None:
+            return vault_storage.convert_to_unified_format(data)
+        started = time.perf_counter()
+        data = vault_storage.convert_to_unified_format(data)
+        self.startup.add_part("нормализация", time.perf_counter() - started)
         return data
 
-    def convert_value_to_unified_format(self, value):
-        """Конвертирует отдельное значение в единый формат"""
-        if isinstance(value, list):
-            # Старый формат папки
-            return {'type': 'folder', 'value': self.convert_to_unified_format(value)}
-        elif isinstance(value, dict):
-            if 'type' in value:
-                # Уже в новом формате
-                if value['type'] == 'folder' and isinstance(value.get('value'), list):
-                    value['value'] = self.convert_to_unified_format(value['value'])
-                return value
-            else:
-                # Словарь без типа - считаем текстом
-                return {'type': 'text', 'value': str(value)}
+    def save_json_file(self, records=None):
+        """Сохранение JSON файла (полный снимок, журнал начинается заново).
+
+        records - новые записи целиком (импорт, структура в настройках).
+        """
+        if records is None:
+            self.journal.reindex()
         else:
-            # Простая строка
-            return {'type': 'text', 'value': str(value)}
+            self.journal.replace_records(records)
+        self.journal.write_snapshot()
 
-    def save_json_file(self):
-        """Сохранение JSON файла"""
-        with open(self.data_file, 'w') as f:
-            json.dump(self.data, f, indent=2)
+    def get_current_folder_id(self):
+        """id текущей папки (None - корень)"""
+        return self.root[-1] if self.root else None
 
     def get_current_table_data(self):
-        """Получить текущий уровень данных на основе root пути"""
-        tableData = self.data
-        
-        for index, key in self.root:
-            # Находим запись по индексу и ключу
-            if isinstance(tableData, list) and index < len(tableData):
-                record = tableData[index]
-                if key in record:
-                    value = record[key]
-                    # Если это папка, переходим в ее содержимое
-                    if isinstance(value, dict) and value.get('type') == 'folder':
-                        tableData = value.get('value', [])
-                    else:
-                        break
-                else:
-                    break
-            else:
-                break
-                
-        return tableData
+        """Получить записи текущей папки по ее id из индекса"""
+        index = self.journal.index
+        # Папку могли удалить или переместить - возвращаемся к существующей
+        if self.root and not (self.root[-1] in index and is_folder(index.nodes[self.root[-1]])):
+            self.root = self.get_folder_path(self.root)
+        return index.children(self.get_current_folder_id())
 
     def draw(self):
         """Отрисовывает текущий уровень данных"""
-        parsed_data = []
-        tableData = self.get_current_table_data()
-        
-        # Если достигли конечного значения
-        if not isinstance(tableData, list):
-            if isinstance(tableData, dict) and tableData.get('type') != 'folder':
-                # Копируем значение в буфер обмена
-                actual_value = tableData.get('value', '')
-                self.copy_to_clipboard_safe(actual_value)
-                self.root = self.root[:-1]
-                self.master.after(100, self.quit_application)
-                return
-            else:
-                # Неизвестный формат, возвращаемся назад
-                self.root = self.root[:-1]
-                self.draw()
-                return
-        
-        # Отображаем содержимое текущего уровня
-        for item in tableData:
-            for key, value in item.items():
-                parsed_data.append({key: value})
-        
-        self.parsed_data = parsed_data
+        self.frequent_ids = self.get_frequent_ids() if not self.root else []
         self.update_tree()
-        return parsed_data
+
+    def get_frequent_ids(self):
+        """id часто используемых записей, которые еще есть в данных"""
+        index = self.journal.index
+        return [node_id for node_id in self.usage.top(FREQUENT_COUNT * 2)
+                if node_id in index and not is_folder(index.nodes[node_id])][:FREQUENT_COUNT]
+
+    def format_display_value(self, value):
+        """Текст колонки "Значение" для записи"""
+        # Единый формат: все значения - словари с type и value
+        if isinstance(value, dict) and 'type' in value:
+            actual_value = value.get('value', '')
+            value_type = value.get('type', 'text')
+            
+            if value_type == 'url':
+                display_value = f"🔗 {actual_value}" if actual_value else "🔗 [ссылка]"
+            elif value_type == 'totp':
+                current_code = self.totp.code(actual_value)
+                if current_code is not None:
+                    display_value = f"🔐 {current_code} ({seconds_remaining()}с)"
+                else:
+                    display_value = "🔐 [неверный TOTP секрет]"
+            elif value_type == 'password':
+                if actual_value:
+                    display_value = "•" * min(len(actual_value), 20)
+                    if len(actual_value) > 20:
+                        display_value += "..."
+                else:
+                    display_value = "[пустой пароль]"
+            elif value_type == 'folder':
+                sub_items = value.get('value', [])
+                display_value = f"📁 [папка: {len(sub_items)} записей]"
+            else:  # text
+                display_value = actual_value if len(actual_value) <= 50 else actual_value[:47] + "..."
+        else:
+            # Если формат не соответствует единому, показываем как текст
+            display_value = str(value) if len(str(value)) <= 50 else str(value)[:47] + "..."
+        return display_value
 
     def update_tree(self):
-        """Обновляем Treeview с данными"""
-        self.tree.delete(*self.tree.get_children())
-        
-        for item in self.parsed_data:
+        """Обновляем Treeview с данными текущей папки"""
+        # Частые записи из любых папок - в начале корня
+        index = self.journal.index
+        rows = [(FREQUENT_PREFIX + node_id, f"★ {index.name(node_id)}", index.nodes[node_id])
+                for node_id in self.frequent_ids]
+
+        for item in self.get_current_table_data():
             for name, value in item.items():
-                # Единый формат: все значения - словари с type и value
-                if isinstance(value, dict) and 'type' in value:
-                    actual_value = value.get('value', '')
-                    value_type = value.get('type', 'text')
-                    
-                    if value_type == 'url':
-                        display_value = f"🔗 {actual_value}" if actual_value else "🔗 [ссылка]"
-                    elif value_type == 'totp':
-                        try:
-                            totp = pyotp.TOTP(actual_value)
-                            current_code = totp.now()
-                            time_remaining = totp.interval - (int(time.time()) % totp.interval)
-                            display_value = f"🔐 {current_code} ({time_remaining}с)"
-                        except:
-                            display_value = "🔐 [неверный TOTP секрет]"
-                    elif value_type == 'password':
-                        if actual_value:
-                            display_value = "•" * min(len(actual_value), 20)
-                            if len(actual_value) > 20:
-                                display_value += "..."
-                        else:
-                            display_value = "[пустой пароль]"
-                    elif value_type == 'folder':
-                        sub_items = value.get('value', [])
-                        display_value = f"📁 [папка: {len(sub_items)} записей]"
-                    else:  # text
-                        display_value = actual_value if len(actual_value) <= 50 else actual_value[:47] + "..."
-                else:
-                    # Если формат не соответствует единому, показываем как текст
-                    display_value = str(value) if len(str(value)) <= 50 else str(value)[:47] + "..."
-                
-                self.tree.insert("", "end", text=name, values=(display_value,))
+                # id строки совпадает с id записи
+                rows.append((value['id'], name, value))
+
+        # Текст значений (маска пароля, код TOTP) считается только для строк в окне
+        self.tree_rows.show(rows, self.format_display_value)
+
+    def schedule_totp_tick(self):
+        """Планирует обновление TOTP-кодов на начало следующей секунды"""
+        delay = 1000 - int(time.time() * 1000) % 1000
+        self.totp_tick_id = self.master.after(delay, self.tick_totp)
+
+    def tick_totp(self):
+        """Обновляет обратный отсчет и коды в видимых TOTP-ячейках"""
+        if self.master.state() != 'withdrawn':
+            visible = [iid for iid in self.tree_rows.visible_ids() if self.is_totp_row(iid)]
+            if visible:
+                # Коды пересчитываются движком только при смене шага времени
+                self.tree_rows.update_values(visible)
+        self.schedule_totp_tick()
+
+    def is_totp_row(self, iid):
+        """Показывает ли строка TOTP-код"""
+        if iid.startswith(FREQUENT_PREFIX):
+            iid = iid[len(FREQUENT_PREFIX):]
+        node = self.journal.index.nodes.get(iid)
+        # В режиме поиска в колонке значения путь, а не код
+        return (not self.search_active and isinstance(node, dict) and node.get('type') == 'totp')
 
     def select_first_item(self):
         """Выбирает первый элемент в дереве"""
         try:
-            first_item = self.tree.get_children()[0]
-            self.tree.selection_set(first_item)
-            self.tree.focus(first_item)
+            self.select_item(self.tree_rows.ids()[0])
         except IndexError:
             pass
             
+    @timed_action('navigate_left')
     def navigate_left(self):
         """Навигация назад"""
         if len(self.root) > 0:
-            pos = self.root[-1][0]
+            self.remember_cursor()
+            folder_id = self.root[-1]
             self.root = self.root[:-1]
             self.draw()
-            children = self.tree.get_children()
-            if children and pos < len(children):
-                self.tree.selection_set(children[pos])
-                self.tree.focus(children[pos])
+            # Выбираем папку, из которой вышли
+            self.select_item(folder_id)
 
+    @timed_action('navigate_right')
     def navigate_right(self):
         """Переход внутрь категории или копирование значения/открытие URL"""
-        selection = self.tree.selection()
-        if not selection:
+        node_id = self.get_selected_node_id()
+        index = self.journal.index
+        if node_id not in index:
             return
             
-        index = self.tree.index(selection[0])
-        tableData = self.get_current_table_data()
-        
-        if isinstance(tableData, list) and index < len(tableData):
-            selected_record = tableData[index]
-            for key, value in selected_record.items():
-                if isinstance(value, dict) and value.get('type') == 'folder':
-                    # Это папка - переходим внутрь
-                    self.root.append([index, key])
-                    self.draw()
-                    self.select_first_item()
-                else:
-                    # Это значение - обрабатываем в зависимости от типа
-                    self.handle_value_action(value, key)
-                break
+        value = index.nodes[node_id]
+        if is_folder(value):
+            # Это папка - переходим внутрь, к строке, выбранной там в прошлый раз
+            self.remember_cursor()
+            self.root.append(node_id)
+            self.draw()
+            self.select_remembered_item()
+        else:
+            # Это значение - обрабатываем в зависимости от типа
+            self.handle_value_action(value, index.name(node_id))
 
+    @timed_action('handle_value_action')
     def handle_value_action(self, value, key):
         """Обрабатывает действие для значения"""
+        if isinstance(value, dict):
+            self.usage.record(value.get('id'))
         if isinstance(value, dict) and 'type' in value:
             actual_value = value.get('value', '')
             value_type = value.get('type', 'text')
             
             if value_type == 'url' and actual_value:
+                # Окно прячется сразу, браузер запускается, и программа закрывается
+                self.hide_window()
                 try:
-                    def open_url():
-                        webbrowser.open(actual_value)
-                        print(f"Открываю URL: {actual_value}")
-                    
-                    threading.Thread(target=open_url, daemon=True).start()
+                    import webbrowser
+                    webbrowser.open(actual_value)
+                    print(f"Открываю URL: {actual_value}")
                 except Exception as e:
                     messagebox.showerror("Ошибка", f"Не удалось открыть URL: {e}")
-                finally:
-                    self.save_state()
-                    self.master.after(100, self.quit_application)
+                self.finish_action(copied=False)
                     
             elif value_type == 'totp' and actual_value:
-                try:
-                    totp = pyotp.TOTP(actual_value)
-                    current_code = totp.now()
-                    self.copy_to_clipboard_safe(current_code)
-                    print(f"Скопирован TOTP код: {current_code}")
-                    self.save_state()
-                    self.master.after(100, self.quit_application)
-                except Exception as e:
-                    messagebox.showerror("Ошибка", f"Не удалось сгенерировать TOTP: {e}")
+                current_code = self.totp.code(actual_value)
+                if current_code is None:
+                    messagebox.showerror("Ошибка", "Не удалось сгенерировать TOTP: неверный секрет")
+                    return
+                self.copy_to_clipboard_safe(current_code)
+                print(f"Скопирован TOTP код: {current_code}")
+                self.finish_action()
             elif value_type == 'password' and actual_value:
                 self.copy_to_clipboard_safe(actual_value)
                 print("Скопирован пароль")
-                self.save_state()
-                self.master.after(100, self.quit_application)
+                self.finish_action()
             else:
                 self.copy_to_clipboard_safe(actual_value)
-                self.save_state()
-                self.master.after(100, self.quit_application)
+                self.finish_action()
         else:
             self.copy_to_clipboard_safe(str(value))
+            self.finish_action()
+
+    def finish_action(self, copied=True):
+        """Закрывает программу, как только копирование и запись состояния завершены"""
+        self.mark_timing("действие")
+        if copied and not self.clipboard.persistent and not self.daemon:
+            # Без утилиты буфера обмена в X11 значение живет, пока живо окно:
+            # прячем окно и выходим, когда буфер перейдет к другой программе
             self.save_state()
-            self.master.after(100, self.quit_application)
+            self.hide_window()
+            self.clipboard_hold_until = time.monotonic() + (self.settings.get('clipboard_ttl', 30) or CLIPBOARD_HOLD_LIMIT)
+            self.wait_clipboard_release()
+            return
+        self.quit_application()
+
+    def wait_clipboard_release(self):
+        """Ждет, пока буфер обмена перестанет принадлежать окну, и выходит"""
+        try:
+            owner = self.master.tk.call('selection', 'own', '-selection', 'CLIPBOARD')
+        except tk.TclError:
+            owner = ""
+        if not owner or time.monotonic() >= self.clipboard_hold_until:
+            self.quit_application()
+            return
+        self.master.after(CLIPBOARD_POLL_MS, self.wait_clipboard_release)
+
+    def mark_startup(self, name):
+        """Отмечает окончание этапа запуска (если включен замер запуска)"""
+        if self.startup is not None:
+            self.startup.mark(name)
+
+    def mark_timing(self, name):
+        """Отмечает этап обработки нажатия (если включен замер задержки)"""
+        if self.key_time is not None:
+            self.timing_marks.append((name, time.perf_counter()))
+
+    def log_exit_latency(self):
+        """Печатает в stderr время от нажатия клавиши до выхода по этапам"""
+        if self.key_time is None or not os.environ.get(TIMING_ENV):
+            return
+        self.mark_timing("выход")
+        stages = ", ".join(f"{name} {(moment - self.key_time) * 1000:.1f} мс"
+                           for name, moment in self.timing_marks)
+        print(f"Нажатие -> {stages}", file=sys.stderr)
 
     def quit_application(self):
         """Полное закрытие приложения"""
         self.save_state()
+        self.latency.flush()
+        if self.daemon:
+            self.hide_window()
+            self.log_exit_latency()
+            return
+        self.journal.close()
+        self.mark_timing("журнал")
+        if self.totp_tick_id is not None:
+            self.master.after_cancel(self.totp_tick_id)
         self.master.quit()
         self.master.destroy()
+        self.log_exit_latency()
         sys.exit(0)
 
     def go_to_root(self):
         """Переход в корень с обновлением навигации"""
+        self.remember_cursor()
         self.root = []
         self.draw()
-        self.select_first_item()
+        self.select_remembered_item()
 
+    @timed_action('navigate_up_down')
     def navigate_up_down(self, event):
         """Навигация вверх/вниз по списку"""
-        selection = self.tree.selection()
-        if not selection:
-            return
-            
-        current_item = selection[0]
-        children = self.tree.get_children()
-        
-        if not children:
+        current_item = self.get_selected_id()
+        if current_item not in self.tree_rows:
             return
             
-        current_index = children.index(current_item)
+        # Соседняя строка берется из полного списка, а не только из окна в дереве
+        children = self.tree_rows.ids()
+        current_index = self.tree_rows.index(current_item)
         
         if event.keysym == 'Up' and current_index > 0:
             new_item = children[current_index - 1]
@@ -586,9 +873,14 @@ class CredentialsTable:
         else:
             return
 
-        self.tree.selection_set(new_item)
-        self.tree.focus(new_item)
+        self.select_item(new_item)
         
+    def on_tree_scroll(self, event):
+        """Колесо мыши в большой папке прокручивает окно строк"""
+        step = -3 if event.num == 4 or event.delta > 0 else 3
+        if self.tree_rows.scroll(step):
+            return "break"
+
     def handle_r_key(self, event):
         """Обработка клавиши R - переход в корень"""
         self.go_to_root()
@@ -611,40 +903,37 @@ class CredentialsTable:
                 messagebox.showwarning("Предупреждение", f"Для типа '{value_type}' значение обязательно!")
                 return
             
-            # Создаем запись в едином формате
-            if value_type == 'folder':
-                new_record = {name: {'type': 'folder', 'value': []}}
-            else:
-                new_record = {name: {'type': value_type, 'value': value}}
-            
-            current_data.append(new_record)
-            self.save_json_file()
-            self.draw()
-            
-            # Обновляем навигацию после добавления
-            for i, item_id in enumerate(self.tree.get_children()):
-                if self.tree.item(item_id, "text") == name:
-                    self.tree.selection_set(item_id)
-                    self.tree.focus(item_id)
-                    self.tree.see(item_id)
-                    break
+            # Задержка считается без времени, проведенного в диалоге
+            with self.latency.measure('add'):
+                # Создаем запись в едином формате
+                node_id = new_node_id()
+                if value_type == 'folder':
+                    new_record = {name: {'type': 'folder', 'value': [], 'id': node_id}}
+                else:
+                    new_record = {name: {'type': value_type, 'value': value, 'id': node_id}}
+
+                self.journal.apply({'op': 'insert', 'parent': self.get_current_folder_id(),
+                                    'index': len(current_data), 'record': new_record})
+                self.redraw()
+
+                # Обновляем навигацию после добавления
+                self.select_item(node_id)
 
     def edit_selected_record(self):
         """Редактировать выбранную запись"""
-        selection = self.tree.selection()
-        if not selection:
+        selected_id = self.get_selected_id()
+        if not selected_id:
             messagebox.showwarning("Предупреждение", "Выберите запись для редактирования")
             return
             
-        index = self.tree.index(selection[0])
-        current_data = self.get_current_table_data()
-        if not isinstance(current_data, list) or index >= len(current_data):
+        node_id = self.get_selected_node_id()
+        index = self.journal.index
+        if node_id not in index:
             messagebox.showwarning("Предупреждение", "Невозможно редактировать на этом уровне")
             return
         
-        selected_record = current_data[index]
-        current_name = list(selected_record.keys())[0]
-        current_value = selected_record[current_name]
+        current_name = index.name(node_id)
+        current_value = index.nodes[node_id]
         
         # Получаем текущие значения из единого формата
         if isinstance(current_value, dict) and 'type' in current_value:
@@ -663,45 +952,39 @@ class CredentialsTable:
             if new_value_type != 'folder' and not new_value.strip():
                 messagebox.showwarning("Предупреждение", f"Для типа '{new_value_type}' значение обязательно!")
                 return
+
+            if (new_name == current_name and new_value_type == current_value_type
+                    and (new_value_type == 'folder' or new_value == current_value_str)):
+                # Ничего не изменилось - журнал не трогаем
+                return
             
-            del current_data[index]
-            
-            if new_value_type == 'folder':
-                updated_record = {new_name: {'type': 'folder', 'value': []}}
-                # Сохраняем существующие данные если редактируем папку
-                if isinstance(current_value, dict) and current_value.get('type') == 'folder':
-                    updated_record[new_name]['value'] = current_value.get('value', [])
-            else:
-                updated_record = {new_name: {'type': new_value_type, 'value': new_value}}
-            
-            current_data.insert(index, updated_record)
-            self.save_json_file()
-            self.draw()
-            
-            # Обновляем навигацию после редактирования
-            for i, item_id in enumerate(self.tree.get_children()):
-                if self.tree.item(item_id, "text") == new_name:
-                    self.tree.selection_set(item_id)
-                    self.tree.focus(item_id)
-                    self.tree.see(item_id)
-                    break
+            with self.latency.measure('edit'):
+                # Запись меняется на месте: id и вложенные записи папки остаются,
+                # в журнал попадают только имя, тип и значение
+                operation = {'op': 'edit', 'id': node_id, 'name': new_name, 'type': new_value_type}
+                if new_value_type != 'folder':
+                    operation['value'] = new_value
+                self.journal.apply(operation)
+                self.redraw()
+
+                # Обновляем навигацию после редактирования
+                self.select_item(selected_id)
 
     def delete_selected_record(self):
         """Удалить выбранную запись"""
-        selection = self.tree.selection()
-        if not selection:
+        selected_id = self.get_selected_id()
+        if not selected_id:
             messagebox.showwarning("Предупреждение", "Выберите запись для удаления")
             return
             
-        index = self.tree.index(selection[0])
-        current_data = self.get_current_table_data()
-        if not isinstance(current_data, list) or index >= len(current_data):
+        node_id = self.get_selected_node_id()
+        if node_id not in self.journal.index:
             messagebox.showwarning("Предупреждение", "Невозможно удалить на этом уровне")
             return
         
-        record_to_delete = current_data[index]
-        record_name = list(record_to_delete.keys())[0]
-        record_value = record_to_delete[record_name]
+        index = self.tree_rows.index(selected_id)
+        record_name = self.journal.index.name(node_id)
+        record_value = self.journal.index.nodes[node_id]
         
         # Определяем количество подзаписей
         subrecord_count = 0
@@ -716,64 +999,62 @@ class CredentialsTable:
             message = f"Вы уверены, что хотите удалить '{record_name}'?"
         
         if messagebox.askyesno("Подтверждение удаления", message, icon='warning'):
-            del current_data[index]
-            self.save_json_file()
-            self.draw()
-            
-            # Обновляем навигацию после удаления
-            children = self.tree.get_children()
-            if children:
-                new_index = min(index, len(children) - 1)
-                self.tree.selection_set(children[new_index])
-                self.tree.focus(children[new_index])
+            with self.latency.measure('delete'):
+                self.journal.apply({'op': 'delete', 'id': node_id})
+                self.redraw()
+
+                # Обновляем навигацию после удаления
+                children = self.tree_rows.ids()
+                if children:
+                    new_index = min(index, len(children) - 1)
+                    self.select_item(children[new_index])
 
     def move_selected_up(self):
         """Переместить выбранную запись вверх"""
-        selection = self.tree.selection()
-        if not selection:
+        node_id = self.get_selected_id()
+        if not node_id:
             messagebox.showwarning("Предупреждение", "Выберите запись для перемещения")
             return
+        if self.search_active and node_id in self.journal.index:
+            # Порядок результатов поиска - не порядок в папке: запись
+            # перемещается в своей папке, и окно переходит туда
+            self.leave_search(node_id)
+            self.draw()
+            self.select_item(node_id)
             
-        index = self.tree.index(selection[0])
-        current_data = self.get_current_table_data()
-        
-        if not isinstance(current_data, list) or index >= len(current_data) or index == 0:
+        if node_id not in self.journal.index or self.journal.index.position(node_id) == 0:
             messagebox.showwarning("Предупреждение", "Невозможно переместить запись вверх")
             return
         
-        current_data[index], current_data[index-1] = current_data[index-1], current_data[index]
-        self.save_json_file()
-        self.draw()
-        
-        children = self.tree.get_children()
-        if children and index-1 < len(children):
-            self.tree.selection_set(children[index-1])
-            self.tree.focus(children[index-1])
-            self.tree.see(children[index-1])
+        # Позиция в папке, а не номер строки: в корне сверху могут быть частые записи
+        with self.latency.measure('move'):
+            index = self.journal.index.position(node_id)
+            self.journal.apply({'op': 'move', 'id': node_id, 'from': index, 'to': index - 1})
+            self.draw()
+            self.select_item(node_id)
 
     def move_selected_down(self):
         """Переместить выбранную запись вниз"""
-        selection = self.tree.selection()
-        if not selection:
+        node_id = self.get_selected_id()
+        if not node_id:
             messagebox.showwarning("Предупреждение", "Выберите запись для перемещения")
             return
+        if self.search_active and node_id in self.journal.index:
+            self.leave_search(node_id)
+            self.draw()
+            self.select_item(node_id)
             
-        index = self.tree.index(selection[0])
         current_data = self.get_current_table_data()
         
-        if not isinstance(current_data, list) or index >= len(current_data) - 1:
+        if node_id not in self.journal.index or self.journal.index.position(node_id) >= len(current_data) - 1:
             messagebox.showwarning("Предупреждение", "Невозможно переместить запись вниз")
             return
         
-        current_data[index], current_data[index+1] = current_data[index+1], current_data[index]
-        self.save_json_file()
-        self.draw()
-        
-        children = self.tree.get_children()
-        if children and index+1 < len(children):
-            self.tree.selection_set(children[index+1])
-            self.tree.focus(children[index+1])
-            self.tree.see(children[index+1])
+        with self.latency.measure('move'):
+            index = self.journal.index.position(node_id)
+            self.journal.apply({'op': 'move', 'id': node_id, 'from': index, 'to': index + 1})
+            self.draw()
+            self.select_item(node_id)
 
 
 class ToolTip:
@@ -938,7 +1219,48 @@ class AddRecordDialog(tk.Toplevel):
         self.result = None
         self.destroy()
 
-if __name__ == "__main__":
+def run_daemon(show):
+    """Запускает фоновый процесс со спрятанным окном"""
+    from daemon import DaemonListener, send_command, COMMAND_SHOW
+
+    # Работающему процессу достаточно команды - окно и данные не загружаются
+    if send_command(COMMAND_SHOW if show else "ping"):
+        if not show:
+            print("Фоновый процесс уже запущен")
+        return
+
     root = tk.Tk()
-    app = CredentialsTable(root)
-    root.mainloop()
+    root.withdraw()
+    app = CredentialsTable(root, daemon=True)
+
+    listener = DaemonListener(root, app.handle_daemon_command)
+    if not listener.start():
+        print("Фоновый процесс уже запущен")
+        root.destroy()
+        if show:
+            # Окно покажет процесс, запустившийся одновременно с этим
+            send_command(COMMAND_SHOW)
+        return
+
+    app.start_api()
+    if show:
+        app.show_window()
+
+    try:
+        root.mainloop()
+    finally:
+        app.stop_api()
+        listener.stop()
+
+
+if __name__ == "__main__":
+    if '--daemon' in sys.argv:
+        run_daemon(show='--show' in sys.argv)
+    else:
+        if startup is not None:
+            startup.mark("импорт модулей")
+        root = tk.Tk()
+        if startup is not None:
+            startup.mark("окно Tk")
+        app = CredentialsTable(root, startup=startup)
+        root.mainloop()
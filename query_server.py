@@ -0,0 +1,171 @@
+#query_server.py
+# Запросы к загруженным данным в формате JSON-строк: одна строка запроса -
+# одна строка ответа. Данные читаются один раз и перечитываются, только
+# если файл данных или журнал изменились. tkinter не используется
+import json
+import sys
+
+from vault_index import is_folder, split_record
+from search_index import SearchIndex, MAX_RESULTS
+from totp import TotpEngine, seconds_remaining
+
+
+class QueryError(Exception):
+    """Ошибка в запросе, о которой сообщается клиенту"""
+
+
+class VaultQueries:
+    """Ответы на запросы get, list, totp и search по данным журнала"""
+
+    def __init__(self, journal, reload=None):
+        self.journal = journal
+        # Как перечитать данные, если файлы изменил другой процесс (по
+        # умолчанию journal.load); фоновый процесс перечитывает их в потоке окна
+        self.reload = reload or (lambda journal: journal.load())
+        self.totp = TotpEngine()
+        self.search_index = None
+        self.search_source = None
+        self.handlers = {
+            'get': self.query_get,
+            'list': self.query_list,
+            'totp': self.query_totp,
+            'search': self.query_search,
+        }
+
+    def refresh(self):
+        """Перечитывает данные, если файлы изменились после загрузки"""
+        if not self.journal.changed_externally():
+            return
+        try:
+            self.reload(self.journal)
+        except (OSError, ValueError) as e:
+            # Файл переписывается или удален - отвечаем по прежним данным
+            print(f"Ошибка перечитывания данных: {e}", file=sys.stderr)
+
+    def handle(self, request):
+        """Ответ на разобранный запрос (словарь)"""
+        response = {'id': request.get('id')} if isinstance(request, dict) and 'id' in request else {}
+        try:
+            if not isinstance(request, dict):
+                raise QueryError("запрос должен быть объектом JSON")
+            op = request.get('op')
+            if not isinstance(op, str):
+                raise QueryError("не указана операция op")
+            handler = self.handlers.get(op)
+            if handler is None:
+                raise QueryError(f"неизвестная операция: {op}")
+            self.refresh()
+            # Журнал мог смениться при перечитывании - весь запрос идет по одному индексу
+            journal = self.journal
+            with journal.lock:
+                response.update(handler(journal.index, request))
+            response['ok'] = True
+        except QueryError as e:
+            response.update(ok=False, error=str(e))
+        return response
+
+    def handle_line(self, line):
+        """Ответ на строку запроса в виде строки JSON (без перевода строки).
+
+        Строка может содержать массив запросов - тогда ответом будет массив
+        ответов в том же порядке (много записей за один обмен).
+        """
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return json.dumps({'ok': False, 'error': f"неверный JSON: {e}"}, ensure_ascii=False)
+        if isinstance(request, list):
+            return json.dumps([self.handle(item) for item in request], ensure_ascii=False)
+        return json.dumps(self.handle(request), ensure_ascii=False)
+
+    def find(self, index, request, folder_allowed=False):
+        """id записи по пути path из запроса (id запроса только возвращается в ответе)"""
+        path = request.get('path')
+        if not isinstance(path, str):
+            raise QueryError("не указан path")
+        if folder_allowed and not path.strip("/"):
+            return None
+        node_id = index.resolve(path)
+        if node_id is None:
+            raise QueryError(f"запись не найдена: {path}")
+        if is_folder(index.nodes[node_id]) and not folder_allowed:
+            raise QueryError(f"это папка: {path}")
+        return node_id
+
+    def query_get(self, index, request):
+        """Значение записи; для TOTP - текущий код"""
+        node = index.nodes[self.find(index, request)]
+        value = node.get('value', '')
+        if node.get('type') == 'totp':
+            value = self.totp.code(value) if value else None
+            if value is None:
+                raise QueryError("неверный секрет TOTP")
+        return {'type': node.get('type'), 'value': value}
+
+    def query_list(self, index, request):
+        """Записи папки (пустой путь - корень)"""
+        folder_id = self.find(index, request, folder_allowed=True)
+        if folder_id is not None and not is_folder(index.nodes[folder_id]):
+            raise QueryError(f"это не папка: {request['path']}")
+        entries = []
+        for record in index.children(folder_id):
+            name, node = split_record(record)
+            entries.append({'name': name, 'type': node.get('type'), 'id': node['id']})
+        return {'entries': entries}
+
+    def query_totp(self, index, request):
+        """Текущий код TOTP и сколько секунд он еще действует"""
+        node = index.nodes[self.find(index, request)]
+        if node.get('type') != 'totp':
+            raise QueryError(f"это не TOTP: {request['path']}")
+        code = self.totp.code(node.get('value', ''))
+        if code is None:
+            raise QueryError("неверный секрет TOTP")
+        return {'code': code, 'remaining': seconds_remaining()}
+
+    def get_search_index(self, index):
+        """Поисковый индекс данных (строится при первом поиске)"""
+        if self.search_index is None or self.search_source is not index:
+            # После перечитывания данных у журнала новый индекс записей
+            if self.search_index is not None:
+                self.search_source.listeners.remove(self.search_index)
+            self.search_index = SearchIndex(index)
+            self.search_source = index
+        return self.search_index
+
+    def query_search(self, index, request):
+        """Записи, имя которых содержит запрос, с путями"""
+        query = request.get('query')
+        if not isinstance(query, str):
+            raise QueryError("не указан query")
+        limit = request.get('limit', MAX_RESULTS)
+        # bool - подкласс int, но true/false - не число записей
+        if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+            raise QueryError("limit должен быть положительным числом")
+        search_index = self.get_search_index(index)
+        results = []
+        for node_id in search_index.search(query, limit):
+            folder = search_index.path(node_id, "/")
+            name = index.name(node_id)
+            results.append({
+                'name': name,
+                'path': f"{folder}/{name}" if folder else name,
+                'type': index.nodes[node_id].get('type'),
+                'id': node_id,
+            })
+        return {'results': results}
+
+
+def serve_stdio(queries, stdin=None, stdout=None):
+    """Отвечает на запросы из stdin до конца ввода, по строке ответа на запрос.
+
+    Ответы идут в порядке запросов, поэтому клиент может отправить сразу
+    много запросов и читать ответы по мере готовности.
+    """
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+    for line in stdin:
+        if not line.strip():
+            continue
+        stdout.write(queries.handle_line(line).encode('utf-8') + b"\n")
+        stdout.flush()
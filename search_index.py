@@ -0,0 +1,136 @@
+#search_index.py
+# Поисковый индекс по именам записей всего хранилища: отсортированный
+# список имен для поиска по началу и общая строка имен для поиска подстроки
+import bisect
+import heapq
+
+from vault_index import split_record
+
+# Сколько результатов возвращать на один запрос
+MAX_RESULTS = 50
+
+# Сколько совпадений просматривать, чтобы ответ укладывался в кадр
+SCAN_LIMIT = 1000
+
+# Разделитель имен в общей строке (в именах записей не встречается)
+SEPARATOR = "\n"
+
+
+class SearchIndex:
+    """Индекс имен записей, обновляемый вместе с VaultIndex"""
+
+    def __init__(self, vault_index):
+        self.vault_index = vault_index
+        self.reset()
+        # Дальше индекс обновляется при каждой вставке, правке и удалении
+        vault_index.listeners.append(self)
+
+    def reset(self):
+        """Строит индекс заново по всем записям VaultIndex"""
+        self.names = {node_id: split_record(record)[0].lower()
+                      for node_id, record in self.vault_index.records.items()}
+        self.sorted_names = sorted((name, node_id) for node_id, name in self.names.items())
+        self.haystack = None
+
+    def node_added(self, node_id, name, node):
+        """Добавляет запись в индекс"""
+        lowered = name.lower()
+        self.names[node_id] = lowered
+        bisect.insort(self.sorted_names, (lowered, node_id))
+        if self.haystack is not None:
+            # Имя дописывается в конец строки - без ее перестройки
+            self.entries[node_id] = len(self.offsets)
+            self.offsets.append(len(self.haystack))
+            self.haystack_ids.append(node_id)
+            self.haystack += lowered + SEPARATOR
+
+    def node_removed(self, node_id):
+        """Удаляет запись из индекса"""
+        lowered = self.names.pop(node_id, None)
+        if lowered is None:
+            return
+        position = bisect.bisect_left(self.sorted_names, (lowered, node_id))
+        if position < len(self.sorted_names) and self.sorted_names[position] == (lowered, node_id):
+            del self.sorted_names[position]
+        if self.haystack is not None:
+            # Имя остается в строке, но больше не относится ни к какой записи
+            self.haystack_ids[self.entries.pop(node_id)] = None
+            self.removed += 1
+            # Удаленных имен больше, чем живых - строка перестроится при поиске
+            if self.removed > len(self.entries):
+                self.haystack = None
+
+    def build_haystack(self):
+        """Склеивает все имена в одну строку и запоминает, где начинается каждое.
+
+        Каждое имя заканчивается разделителем, чтобы новые имена можно было
+        дописывать в конец.
+        """
+        self.haystack_ids = list(self.names)
+        self.entries = {node_id: entry for entry, node_id in enumerate(self.haystack_ids)}
+        self.removed = 0
+        self.offsets = []
+        offset = 0
+        for name in self.names.values():
+            self.offsets.append(offset)
+            offset += len(name) + len(SEPARATOR)
+        self.haystack = "".join(name + SEPARATOR for name in self.names.values())
+
+    def prefix_matches(self, query):
+        """id записей, имя которых начинается с запроса"""
+        found = set()
+        position = bisect.bisect_left(self.sorted_names, (query, ''))
+        while (position < len(self.sorted_names) and len(found) < SCAN_LIMIT
+               and self.sorted_names[position][0].startswith(query)):
+            found.add(self.sorted_names[position][1])
+            position += 1
+        return found
+
+    def substring_matches(self, query):
+        """id записей, имя которых содержит запрос"""
+        if self.haystack is None:
+            self.build_haystack()
+        found = set()
+        position = self.haystack.find(query)
+        while position != -1 and len(found) < SCAN_LIMIT:
+            entry = bisect.bisect_right(self.offsets, position) - 1
+            node_id = self.haystack_ids[entry]
+            if node_id is not None:
+                found.add(node_id)
+            # Следующее совпадение ищем уже в следующем имени
+            if entry + 1 == len(self.offsets):
+                break
+            position = self.haystack.find(query, self.offsets[entry + 1])
+        return found
+
+    def rank(self, node_id, query, scores):
+        """Ключ сортировки: точное совпадение, начало имени, начало слова, подстрока.
+
+        Внутри каждой группы выше идут часто используемые записи.
+        """
+        name = self.names[node_id]
+        if name == query:
+            tier = 0
+        elif name.startswith(query):
+            tier = 1
+        else:
+            position = name.find(query)
+            tier = 2 if position > 0 and not name[position - 1].isalnum() else 3
+        return (tier, -scores.get(node_id, 0.0), len(name), name)
+
+    def search(self, query, limit=MAX_RESULTS, scores=None):
+        """Возвращает id лучших совпадений по убыванию релевантности.
+
+        scores - счета использования записей (id -> число) для ранжирования.
+        """
+        scores = scores or {}
+        query = query.strip().lower()
+        if not query or SEPARATOR in query:
+            return []
+        found = self.prefix_matches(query) | self.substring_matches(query)
+        return heapq.nsmallest(limit, found, key=lambda node_id: self.rank(node_id, query, scores))
+
+    def path(self, node_id, separator=" / "):
+        """Полный путь к папке записи"""
+        return separator.join(self.vault_index.name(folder_id)
+                              for folder_id in self.vault_index.ancestors(node_id))
@@ -1,18 +1,20 @@
 #settings_dialog.py
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 from settings_general import GeneralSettingsTab
 from settings_export import ExportTab
 from settings_import import ImportTab
 from settings_structure import StructureTab
 
 class SettingsDialog(tk.Toplevel):
-    def __init__(self, parent, settings, save_callback, data):
+    def __init__(self, parent, settings, save_callback, data, persist_callback=None):
         super().__init__(parent)
         self.parent = parent
         self.settings = settings.copy()
         self.save_callback = save_callback
         self.data = data
+        # Сохранение данных через журнал главного окна
+        self.persist_callback = persist_callback
         
         self.title("Настройки")
         self.geometry("700x600")
@@ -27,35 +29,41 @@ class SettingsDialog(tk.Toplevel):
         
         # Биндим Esc на выход
         self.bind('<Escape>', lambda event: self.cancel_clicked())
+        # Закрытие крестиком тоже сохраняет общие настройки
+        self.protocol("WM_DELETE_WINDOW", self.cancel_clicked)
         
         self.create_widgets()
         
     def create_widgets(self):
         # Создаем Notebook для вкладок
-        notebook = ttk.Notebook(self)
-        notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Вкладка основных настроек
-        general_frame = ttk.Frame(notebook)
-        notebook.add(general_frame, text="Основные")
+        general_frame = ttk.Frame(self.notebook)
+        self.notebook.add(general_frame, text="Основные")
         
         # Вкладка экспорта
-        export_frame = ttk.Frame(notebook)
-        notebook.add(export_frame, text="Экспорт")
+        self.export_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.export_frame, text="Экспорт")
         
         # Вкладка импорта
-        import_frame = ttk.Frame(notebook)
-        notebook.add(import_frame, text="Импорт")
+        self.import_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.import_frame, text="Импорт")
         
         # Вкладка управления структурой
-        structure_frame = ttk.Frame(notebook)
-        notebook.add(structure_frame, text="Управление структурой")
+        self.structure_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.structure_frame, text="Управление структурой")
         
-        # Инициализируем вкладки
+        # Основные настройки строятся сразу, остальные вкладки (экспорт и
+        # структура показывают все хранилище) - при первом открытии
         self.general_tab = GeneralSettingsTab(general_frame, self.settings)
-        self.export_tab = ExportTab(export_frame, self.data)
-        self.import_tab = ImportTab(import_frame, self.data, self.save_import_data)
-        self.structure_tab = StructureTab(structure_frame, self.data, self.save_structure_data)
+        self.export_tab = None
+        self.import_tab = None
+        self.structure_tab = None
+        # Построенные вкладки, чьи деревья устарели после импорта или правки структуры
+        self.dirty_tabs = set()
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
         
         # Фрейм для кнопки выхода
         button_frame = tk.Frame(self)
@@ -72,18 +80,49 @@ class SettingsDialog(tk.Toplevel):
         
         # Биндим Enter на выход
         self.bind('<Return>', lambda event: self.cancel_clicked())
+
+    def on_tab_changed(self, event):
+        """Строит или обновляет открытую вкладку"""
+        frame = self.nametowidget(self.notebook.select())
+        if frame is self.export_frame:
+            if self.export_tab is None:
+                self.export_tab = ExportTab(self.export_frame, self.data)
+            elif 'export' in self.dirty_tabs:
+                self.export_tab.populate_tree()
+            self.dirty_tabs.discard('export')
+        elif frame is self.import_frame:
+            if self.import_tab is None:
+                self.import_tab = ImportTab(self.import_frame, self.data, self.save_import_data, self.persist_callback)
+        elif frame is self.structure_frame:
+            if self.structure_tab is None:
+                self.structure_tab = StructureTab(self.structure_frame, self.data, self.save_structure_data, self.persist_callback)
+            elif 'structure' in self.dirty_tabs:
+                self.structure_tab.refresh_structure_tree()
+            self.dirty_tabs.discard('structure')
+
+    def mark_dirty(self, *names):
+        """Отмечает вкладки для обновления при следующем открытии (непостроенные не нужно)"""
+        tabs = {'export': self.export_tab, 'structure': self.structure_tab}
+        self.dirty_tabs.update(name for name in names if tabs[name] is not None)
         
     def save_import_data(self):
         """Callback для сохранения данных после импорта"""
-        # После импорта данных нужно обновить все вкладки
-        self.export_tab.populate_tree()
-        self.structure_tab.refresh_structure_tree()
+        # Деревья экспорта и структуры перестроятся, когда их откроют
+        self.mark_dirty('export', 'structure')
         
     def save_structure_data(self):
         """Callback для сохранения данных после изменения структуры"""
-        # После изменения структуры нужно обновить все вкладки
-        self.export_tab.populate_tree()
+        self.mark_dirty('export')
         
     def cancel_clicked(self):
-        """Закрывает окно без сохранения настроек"""
+        """Сохраняет измененные общие настройки и закрывает окно"""
+        try:
+            general_settings = self.general_tab.get_settings()
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e), parent=self)
+            return
+
+        settings = {**self.settings, **general_settings}
+        if settings != self.settings:
+            self.save_callback(settings)
         self.destroy()
@@ -3,11 +3,19 @@ import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
 import json
 
+import vault_storage
+
 class ExportTab:
     def __init__(self, parent, data):
         self.parent = parent
         self.data = data
+        # Модель выбора: id строки -> имя, значение, выбор, родитель, дети,
+        # число потомков и число выбранных потомков (для трех состояний)
         self.tree_items = {}
+        self.roots = []
+        # Раскрытые папки и строки, текст которых отстал от модели выбора
+        self.open_items = set()
+        self.stale = set()
         
         self.create_widgets()
         self.populate_tree()
@@ -34,6 +42,7 @@ class ExportTab:
         
         # Настраиваем теги для отображения выбранных элементов
         self.tree.tag_configure("checked", background="#e0f0ff")
+        self.tree.tag_configure("partial", background="#f0f7ff")
         
         # Добавляем скроллбар
         scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
@@ -44,6 +53,9 @@ class ExportTab:
         
         # Биндим клик по элементам для выбора/снятия выбора
         self.tree.bind('<Button-1>', self.on_tree_click)
+        # Строки свернутых папок обновляются, только когда папку раскроют
+        self.tree.bind('<<TreeviewOpen>>', self.on_tree_open)
+        self.tree.bind('<<TreeviewClose>>', self.on_tree_close)
         
         # Фрейм для кнопок экспорта
         export_button_frame = tk.Frame(self.parent)
@@ -77,34 +89,38 @@ class ExportTab:
     
     def populate_tree(self):
         """Заполняет дерево данными для выбора экспорта"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.tree.delete(*self.tree.get_children())
         self.tree_items = {}
-        self.add_tree_items("", self.data)
+        self.roots = self.add_tree_items("", self.data)
+        self.open_items = set()
+        self.stale = set()
         
     def add_tree_items(self, parent, data):
-        """Рекурсивно добавляет элементы в дерево"""
+        """Рекурсивно добавляет элементы в дерево, возвращает id добавленных строк"""
+        added = []
         if isinstance(data, list):
-            for i, item in enumerate(data):
+            for item in data:
                 for key, value in item.items():
-                    # Создаем отображаемое имя с эмодзи или без
-                    display_name = f"☐ {key}"  # Незакрашенный чекбокс
-                    
-                    item_id = self.tree.insert(parent, "end", text=display_name, values=(self.get_value_type(value),))
-                    
-                    # Сохраняем информацию об элементе
-                    self.tree_items[item_id] = {
+                    item_id = self.tree.insert(parent, "end", text=f"☐ {key}", values=(self.get_value_type(value),))
+                    info = {
                         'key': key,
                         'value': value,
-                        'display_name': display_name,
                         'selected': False,
                         'is_folder': self.is_folder(value),
-                        'parent': parent
+                        'parent': parent,
+                        'children': [],
+                        'descendants': 0,
+                        'selected_below': 0,
                     }
+                    self.tree_items[item_id] = info
+                    added.append(item_id)
                     
                     # Рекурсивно добавляем дочерние элементы (работает с единым форматом)
-                    if isinstance(value, dict) and value.get('type') == 'folder':
-                        self.add_tree_items(item_id, value.get('value', []))
+                    if info['is_folder']:
+                        info['children'] = self.add_tree_items(item_id, value.get('value', []))
+                        info['descendants'] = sum(self.tree_items[child]['descendants'] + 1
+                                                  for child in info['children'])
+        return added
     
     def is_folder(self, value):
         """Проверяет, является ли значение папкой"""
@@ -136,107 +152,125 @@ class ExportTab:
         if item and item in self.tree_items:
             column = self.tree.identify_column(event.x)
             if column == "#0":  # Клик по имени элемента
-                # Переключаем состояние выбора
-                if self.tree_items[item]['selected']:
+                # Выбранная целиком ветка снимается, частично выбранная - выбирается целиком
+                if self.check_mark(self.tree_items[item])[0] == "☑":
                     self.deselect_item_recursive(item)
                 else:
                     self.select_item_with_parents(item)
-    
+
+    def on_tree_open(self, event):
+        """Раскрытая папка показывает актуальный выбор своих строк"""
+        item = self.tree.focus()
+        if item in self.tree_items:
+            self.open_items.add(item)
+            for child in self.tree_items[item]['children']:
+                self.render_visible(child)
+
+    def on_tree_close(self, event):
+        """Запоминает, что папка свернута"""
+        self.open_items.discard(self.tree.focus())
+
+    def check_mark(self, info):
+        """Чекбокс и теги строки: выбрано все, выбрано частично или ничего"""
+        if info['selected'] and info['selected_below'] == info['descendants']:
+            return "☑", ("checked",)
+        if info['selected'] or info['selected_below']:
+            return "▣", ("partial",)
+        return "☐", ()
+
+    def render_row(self, item):
+        """Обновляет текст строки, если он отстал от модели"""
+        if item in self.stale:
+            self.stale.discard(item)
+            info = self.tree_items[item]
+            mark, tags = self.check_mark(info)
+            self.tree.item(item, text=f"{mark} {info['key']}", tags=tags)
+
+    def render_visible(self, item):
+        """Обновляет строку и строки под ней в раскрытых папках"""
+        stack = [item]
+        while stack:
+            current = stack.pop()
+            self.render_row(current)
+            if current in self.open_items:
+                stack.extend(self.tree_items[current]['children'])
+
+    def render(self, item):
+        """Обновляет строки после изменения выбора ветки item"""
+        parent = self.tree_items[item]['parent']
+        while parent:
+            self.render_row(parent)
+            parent = self.tree_items[parent]['parent']
+        self.render_visible(item)
+
+    def set_subtree(self, item, selected):
+        """Выбирает ветку целиком или снимает с нее выбор.
+
+        Возвращает, на сколько изменилось число выбранных строк в ветке
+        (родителям его добавляет вызывающий).
+        """
+        info = self.tree_items[item]
+        before = info['selected'] + info['selected_below']
+        stack = [item]
+        while stack:
+            current = stack.pop()
+            node = self.tree_items[current]
+            node['selected'] = selected
+            node['selected_below'] = node['descendants'] if selected else 0
+            self.stale.add(current)
+            stack.extend(node['children'])
+        after = info['descendants'] + 1 if selected else 0
+        return after - before
+
+    def update_parents(self, item, delta, select=False):
+        """Добавляет родителям изменение числа выбранных потомков.
+
+        select - заодно выбрать родителей (экспорт записи требует ее папок).
+        """
+        parent = self.tree_items[item]['parent']
+        while parent:
+            info = self.tree_items[parent]
+            info['selected_below'] += delta
+            if select and not info['selected']:
+                info['selected'] = True
+                delta += 1
+            self.stale.add(parent)
+            parent = info['parent']
+
     def select_item_with_parents(self, item):
-        """Выбирает элемент и всех его родителей рекурсивно"""
-        if item not in self.tree_items:
-            return
-        
-        # Сначала выбираем всех родителей (снизу вверх)
-        self.select_parents_recursive(item)
-        
-        # Затем выбираем текущий элемент и всех его детей
-        self.select_item_recursive(item)
-    
-    def select_parents_recursive(self, item):
-        """Рекурсивно выбирает всех родителей элемента"""
+        """Выбирает элемент со всеми детьми и всех его родителей"""
         if item not in self.tree_items:
             return
-            
-        parent_id = self.tree_items[item]['parent']
-        
-        # Если есть родитель и он еще не выбран - выбираем его
-        if parent_id and parent_id in self.tree_items and not self.tree_items[parent_id]['selected']:
-            self.select_parents_recursive(parent_id)
-            self.select_item(parent_id)
+        self.update_parents(item, self.set_subtree(item, True), select=True)
+        self.render(item)
     
     def select_item_recursive(self, item):
-        """Выбирает элемент и ВСЕХ его детей рекурсивно"""
+        """Выбирает элемент и ВСЕХ его детей"""
         if item not in self.tree_items:
             return
-            
-        # Выбираем текущий элемент
-        self.tree_items[item]['selected'] = True
-        new_name = f"☑ {self.tree_items[item]['key']}"
-        self.tree.item(item, text=new_name, tags=("checked",))
-        self.tree_items[item]['display_name'] = new_name
-        
-        # Рекурсивно выбираем всех детей
-        for child_id in self.tree.get_children(item):
-            self.select_item_recursive(child_id)
+        self.update_parents(item, self.set_subtree(item, True))
+        self.render(item)
     
     def deselect_item_recursive(self, item):
-        """Снимает выбор с элемента и ВСЕХ его детей рекурсивно"""
+        """Снимает выбор с элемента и ВСЕХ его детей"""
         if item not in self.tree_items:
             return
-            
-        # Снимаем выбор с текущего элемента
-        self.tree_items[item]['selected'] = False
-        new_name = f"☐ {self.tree_items[item]['key']}"
-        self.tree.item(item, text=new_name, tags=())
-        self.tree_items[item]['display_name'] = new_name
-        
-        # Рекурсивно снимаем выбор со всех детей
-        for child_id in self.tree.get_children(item):
-            self.deselect_item_recursive(child_id)
-    
-    def select_item(self, item):
-        """Выбирает только один элемент (без детей)"""
-        if item in self.tree_items:
-            self.tree_items[item]['selected'] = True
-            # Обновляем отображение - меняем на закрашенный чекбокс
-            new_name = f"☑ {self.tree_items[item]['key']}"
-            self.tree.item(item, text=new_name, tags=("checked",))
-            self.tree_items[item]['display_name'] = new_name
-    
-    def deselect_item(self, item):
-        """Снимает выбор только с одного элемента (без детей)"""
-        if item in self.tree_items:
-            self.tree_items[item]['selected'] = False
-            # Обновляем отображение - меняем на незакрашенный чекбокс
-            new_name = f"☐ {self.tree_items[item]['key']}"
-            self.tree.item(item, text=new_name, tags=())
-            self.tree_items[item]['display_name'] = new_name
+        self.update_parents(item, self.set_subtree(item, False))
+        self.render(item)
     
     def select_all(self):
         """Выбирает все элементы дерева"""
-        for item in self.tree.get_children():
+        for item in self.roots:
             self.select_item_recursive(item)
     
     def deselect_all(self):
         """Снимает выбор со всех элементов дерева"""
-        for item in self.tree.get_children():
+        for item in self.roots:
             self.deselect_item_recursive(item)
     
     def get_selected_items(self):
-        """Возвращает список выбранных элементов"""
-        selected = []
-        for item in self.tree.get_children():
-            self.collect_selected_recursive(item, selected)
-        return selected
-    
-    def collect_selected_recursive(self, item, selected_list):
-        """Рекурсивно собирает выбранные элементы"""
-        if item in self.tree_items and self.tree_items[item]['selected']:
-            selected_list.append(item)
-        
-        for child in self.tree.get_children(item):
-            self.collect_selected_recursive(child, selected_list)
+        """Возвращает список выбранных элементов (в порядке дерева)"""
+        return [item for item, info in self.tree_items.items() if info['selected']]
     
     def validate_selection(self, selected_items):
         """Проверяет, что выбранные элементы имеют родительские папки"""
@@ -285,74 +319,40 @@ class ExportTab:
         
         try:
             # Собираем данные для экспорта
-            export_data = self.build_export_data(selected_items)
+            export_data = self.build_export_data()
             
             # Сохраняем в файл
             with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, indent=2, ensure_ascii=False)
+                # Без заголовка журнала: он относится только к creds.json
+                document = {'format_version': vault_storage.FORMAT_VERSION, 'records': export_data}
+                json.dump(document, f, indent=2, ensure_ascii=False)
             
             messagebox.showinfo("Экспорт", f"Данные успешно экспортированы в файл:\n{filename}")
             
         except Exception as e:
             messagebox.showerror("Ошибка экспорта", f"Не удалось экспортировать данные:\n{str(e)}")
     
-    def build_export_data(self, selected_items):
-        """Строит структуру данных для экспорта на основе выбранных элементов"""
+    def build_export_data(self, items=None):
+        """Строит структуру данных для экспорта одним проходом по модели выбора.
+
+        Берутся выбранные строки и папки, в которых что-то выбрано.
+        Постоянные id записей не экспортируются - при импорте выдаются новые.
+        """
         export_data = []
-        
-        # Создаем множество выбранных элементов для быстрого поиска
-        selected_set = set(selected_items)
-        
-        # Собираем корневые элементы, которые выбраны напрямую или имеют выбранных потомков
-        root_items = []
-        for item_id in self.tree.get_children():
-            if self.is_item_or_any_child_selected(item_id, selected_set):
-                root_items.append(item_id)
-        
-        # Для каждого корневого элемента собираем полную структуру
-        for item_id in root_items:
-            if item_id in self.tree_items:
-                item_info = self.tree_items[item_id]
-                key = item_info['key']
-                value = item_info['value']
-                
-                # Рекурсивно собираем полную структуру элемента
-                processed_value = self.process_export_value(item_id, value, selected_set)
-                export_data.append({key: processed_value})
-        
+        for item_id in self.roots if items is None else items:
+            info = self.tree_items[item_id]
+            if not self.is_item_or_any_child_selected(item_id):
+                continue
+            value = info['value']
+            if info['is_folder']:
+                # Папка в едином формате - только с выбранным содержимым
+                value = {'type': 'folder', 'value': self.build_export_data(info['children'])}
+            elif isinstance(value, dict):
+                value = {key: item for key, item in value.items() if key != 'id'}
+            export_data.append({info['key']: value})
         return export_data
     
-    def process_export_value(self, item_id, value, selected_set):
-        """Обрабатывает значение для экспорта с сохранением структуры"""
-        if isinstance(value, dict) and value.get('type') == 'folder':
-            # Папка в едином формате - обрабатываем содержимое
-            processed_children = []
-            
-            for child_id in self.tree.get_children(item_id):
-                if self.is_item_or_any_child_selected(child_id, selected_set):
-                    if child_id in self.tree_items:
-                        child_info = self.tree_items[child_id]
-                        child_key = child_info['key']
-                        child_value = child_info['value']
-                        
-                        # Рекурсивно обрабатываем дочерний элемент
-                        processed_child_value = self.process_export_value(child_id, child_value, selected_set)
-                        processed_children.append({child_key: processed_child_value})
-            
-            # Возвращаем папку с обработанными детьми в едином формате
-            return {'type': 'folder', 'value': processed_children}
-        else:
-            # Простое значение - возвращаем как есть
-            return value
-    
-    def is_item_or_any_child_selected(self, item_id, selected_set):
+    def is_item_or_any_child_selected(self, item_id):
         """Проверяет, выбран ли элемент или любой из его потомков"""
-        if item_id in selected_set:
-            return True
-        
-        # Проверяем всех детей рекурсивно
-        for child_id in self.tree.get_children(item_id):
-            if self.is_item_or_any_child_selected(child_id, selected_set):
-                return True
-        
-        return False
+        info = self.tree_items[item_id]
+        return info['selected'] or info['selected_below'] > 0
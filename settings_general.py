@@ -9,6 +9,7 @@ class GeneralSettingsTab:
         
         self.save_position_var = tk.BooleanVar(value=self.settings.get('save_position', True))
         self.timeout_var = tk.StringVar(value=str(self.settings.get('restore_timeout', 60)))
+        self.clipboard_ttl_var = tk.StringVar(value=str(self.settings.get('clipboard_ttl', 30)))
         
         self.create_widgets()
     
@@ -42,6 +43,25 @@ class GeneralSettingsTab:
             font=("Arial", 8)
         )
         hint_label.pack(anchor=tk.W, padx=20, pady=(5, 20))
+
+        # Фрейм для настройки очистки буфера обмена
+        clipboard_frame = tk.Frame(self.parent)
+        clipboard_frame.pack(fill=tk.X, padx=20, pady=5)
+
+        tk.Label(clipboard_frame, text="Очищать буфер обмена через:").pack(side=tk.LEFT)
+
+        tk.Entry(clipboard_frame, textvariable=self.clipboard_ttl_var, width=8).pack(side=tk.LEFT, padx=5)
+
+        tk.Label(clipboard_frame, text="секунд").pack(side=tk.LEFT)
+
+        clipboard_hint = tk.Label(
+            self.parent,
+            text="Буфер очищается, только если в нем все еще скопированное значение.\n0 - не очищать.",
+            justify=tk.LEFT,
+            fg="gray",
+            font=("Arial", 8)
+        )
+        clipboard_hint.pack(anchor=tk.W, padx=20, pady=(5, 20))
         
         # Обновляем состояние поля ввода таймаута
         self.toggle_timeout_entry()
@@ -64,5 +84,12 @@ class GeneralSettingsTab:
                 settings['restore_timeout'] = int(self.timeout_var.get())
             except ValueError:
                 raise ValueError("Введите корректное число секунд!")
+
+        try:
+            settings['clipboard_ttl'] = int(self.clipboard_ttl_var.get())
+        except ValueError:
+            raise ValueError("Введите корректное число секунд очистки буфера!")
+        if settings['clipboard_ttl'] < 0:
+            raise ValueError("Время очистки буфера не может быть отрицательным!")
         
         return settings
@@ -2,13 +2,15 @@
 import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
 import json
-import os
+
+import vault_storage
 
 class ImportTab:
-    def __init__(self, parent, data, save_callback):
+    def __init__(self, parent, data, save_callback, persist_callback=None):
         self.parent = parent
         self.data = data
         self.save_callback = save_callback
+        self.persist_callback = persist_callback
         self.import_data = None
         self.import_tree_items = {}
         
@@ -118,38 +120,10 @@ class ImportTab:
     
     def normalize_imported_data(self, data):
         """Нормализует импортированные данные к единому формату"""
-        return self.convert_to_unified_format(data)
-    
-    def convert_to_unified_format(self, data):
-        """Конвертирует данные в единый формат хранения"""
-        if isinstance(data, list):
-            converted_data = []
-            for item in data:
-                if isinstance(item, dict):
-                    converted_item = {}
-                    for key, value in item.items():
-                        converted_item[key] = self.convert_value_to_unified_format(value)
-                    converted_data.append(converted_item)
-            return converted_data
-        return data
-
-    def convert_value_to_unified_format(self, value):
-        """Конвертирует отдельное значение в единый формат"""
-        if isinstance(value, list):
-            # Старый формат папки - конвертируем в новый
-            return {'type': 'folder', 'value': self.convert_to_unified_format(value)}
-        elif isinstance(value, dict):
-            if 'type' in value:
-                # Уже в новом формате
-                if value['type'] == 'folder' and isinstance(value.get('value'), list):
-                    value['value'] = self.convert_to_unified_format(value['value'])
-                return value
-            else:
-                # Словарь без типа - считаем текстом
-                return {'type': 'text', 'value': str(value)}
-        else:
-            # Простая строка - конвертируем в текстовый тип
-            return {'type': 'text', 'value': str(value)}
+        # Файлы текущей версии формата (например, собственный экспорт)
+        # принимаются без обхода дерева
+        records, _ = vault_storage.unpack_document(data)
+        return records
     
     def populate_import_tree(self):
         """Заполняет дерево импорта данными из файла"""
@@ -339,11 +313,8 @@ class ImportTab:
             # Собираем данные для импорта с сохранением структуры
             import_data = self.build_import_data(selected_items)
             
-            # Добавляем данные в основное хранилище (в корень, последними)
-            self.data.extend(import_data)
-            
-            # Сохраняем изменения
-            self.save_import_data()
+            # Добавляем данные в основное хранилище (в корень, последними) и сохраняем
+            self.save_import_data(self.data + import_data)
             
             # Вызываем callback для обновления других вкладок
             if self.save_callback:
@@ -415,15 +386,21 @@ class ImportTab:
         
         return False
     
-    def save_import_data(self):
-        """Сохраняет импортированные данные в основной файл"""
+    def save_import_data(self, records):
+        """Заменяет данные записями records и сохраняет их в основной файл"""
         try:
+            # Главное окно меняет и сохраняет данные через свой журнал изменений
+            # (под его блокировкой - их одновременно читает API)
+            if self.persist_callback:
+                self.persist_callback(records)
+                return
+            self.data[:] = records
+
             # Получаем путь к файлу данных
-            data_file = os.path.join(os.path.expanduser('~'), '.credmanager', 'creds.json')
+            data_file = vault_storage.get_data_file()
             
             # Сохраняем обновленные данные
-            with open(data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            vault_storage.write_vault(data_file, self.data)
                 
         except Exception as e:
             raise Exception(f"Не удалось сохранить данные: {str(e)}")
@@ -1,14 +1,15 @@
 #settings_structure.py
 import tkinter as tk
 from tkinter import messagebox, ttk
-import json
-import os
+
+import vault_storage
 
 class StructureTab:
-    def __init__(self, parent, data, save_callback):
+    def __init__(self, parent, data, save_callback, persist_callback=None):
         self.parent = parent
         self.data = data
         self.save_callback = save_callback
+        self.persist_callback = persist_callback
         self.drag_data = {
             "item": None, 
             "x": 0, 
@@ -301,6 +302,9 @@ class StructureTab:
         """Обновляет дерево структуры"""
         for item in self.structure_tree.get_children():
             self.structure_tree.delete(item)
+        # Исходный узел каждого элемента дерева: при сохранении папки и
+        # записи сохраняют свои id, а с ними и запомненные позиции
+        self.item_nodes = {}
         
         # Добавляем корневую папку (только для визуального представления)
         root_item = self.structure_tree.insert("", "end", text="📁 Корень", values=(f"элементов: {len(self.data)}",), tags=("root",))
@@ -318,6 +322,7 @@ class StructureTab:
                     tag = self.get_structure_tag(value)
                     
                     item_id = self.structure_tree.insert(parent, "end", text=key, values=(self.get_value_type(value),), tags=(tag,))
+                    self.item_nodes[item_id] = value
                     
                     # Рекурсивно добавляем дочерние элементы
                     if isinstance(value, dict) and value.get('type') == 'folder':
@@ -382,12 +387,8 @@ class StructureTab:
             # Собираем новую структуру из дерева
             new_data = self.build_data_from_structure()
             
-            # Обновляем данные
-            self.data.clear()
-            self.data.extend(new_data)
-            
-            # Сохраняем в файл
-            self.save_structure_data()
+            # Обновляем данные и сохраняем в файл
+            self.save_structure_data(new_data)
             
             # Вызываем callback для обновления других вкладок
             if self.save_callback:
@@ -422,16 +423,21 @@ class StructureTab:
             
             # Получаем детей элемента
             children = self.structure_tree.get_children(item_id)
+            original_value = self.item_nodes.get(item_id)
             
-            if children:
-                # Это папка - обрабатываем детей
+            if children or self.get_structure_tag(original_value) == "folder":
+                # Это папка (возможно, опустевшая) - обрабатываем детей
                 children_data = self.build_structure_branch(item_id)
                 
-                # В ЕДИНОМ ФОРМАТЕ создаем папку
-                branch_data.append({key: {'type': 'folder', 'value': children_data}})
+                # В ЕДИНОМ ФОРМАТЕ создаем папку с прежним id
+                folder = {'type': 'folder', 'value': children_data}
+                if isinstance(original_value, dict) and original_value.get('id'):
+                    folder['id'] = original_value['id']
+                branch_data.append({key: folder})
             else:
-                # Это конечный элемент - нужно восстановить исходное значение
-                original_value = self.find_original_value(key, self.data)
+                # Это конечный элемент - восстанавливаем исходное значение
+                if original_value is None:
+                    original_value = self.find_original_value(key, self.data)
                 if original_value:
                     branch_data.append({key: original_value})
                 else:
@@ -454,15 +460,21 @@ class StructureTab:
                             return found
         return None
     
-    def save_structure_data(self):
-        """Сохраняет данные структуры в основной файл"""
+    def save_structure_data(self, records):
+        """Заменяет данные записями records и сохраняет их в основной файл"""
         try:
+            # Главное окно меняет и сохраняет данные через свой журнал изменений
+            # (под его блокировкой - их одновременно читает API)
+            if self.persist_callback:
+                self.persist_callback(records)
+                return
+            self.data[:] = records
+
             # Получаем путь к файлу данных
-            data_file = os.path.join(os.path.expanduser('~'), '.credmanager', 'creds.json')
+            data_file = vault_storage.get_data_file()
             
             # Сохраняем обновленные данные
-            with open(data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            vault_storage.write_vault(data_file, self.data)
                 
         except Exception as e:
             raise Exception(f"Не удалось сохранить данные: {str(e)}")
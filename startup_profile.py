@@ -0,0 +1,103 @@
+#startup_profile.py
+# Замер этапов запуска окна: отметки времени от первой строки main.py до
+# первой отрисовки окна на экране. Включается переменной окружения или
+# флагом; результат - в stderr или в журнал в ~/.credmanager
+import os
+import sys
+import time
+
+# Переменная окружения: "1" или "stderr" - вывод в stderr, "log" - дописать
+# в журнал, "cprofile" - дополнительно сохранить полный профиль (через запятую)
+PROFILE_ENV = "CREDMANAGER_PROFILE"
+
+# Флаг командной строки, равносильный CREDMANAGER_PROFILE=1
+PROFILE_FLAG = "--profile-startup"
+
+LOG_FILE = os.path.join(os.path.expanduser('~'), '.credmanager', 'startup.log')
+PROFILE_FILE = os.path.join(os.path.expanduser('~'), '.credmanager', 'startup.prof')
+
+# Сколько функций профиля (по общему времени) выводить вместе с этапами
+PROFILE_TOP = 25
+
+
+def from_environment(started_at, argv=None, environ=None):
+    """Замер запуска, если он включен, иначе None"""
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    value = environ.get(PROFILE_ENV, "")
+    if PROFILE_FLAG in argv:
+        argv.remove(PROFILE_FLAG)
+        value = value or "1"
+    options = {option.strip().lower() for option in value.split(',') if option.strip()}
+    if not options or options <= {"0", "no", "false"}:
+        return None
+    return StartupProfile(started_at, to_log='log' in options, cprofile='cprofile' in options)
+
+
+class StartupProfile:
+    """Отметки этапов запуска и вложенные в них замеры"""
+
+    def __init__(self, started_at, to_log=False, cprofile=False):
+        self.started_at = started_at
+        self.to_log = to_log
+        # (этап, момент окончания) в порядке выполнения
+        self.marks = []
+        # Части этапов, замеренные отдельно (например, нормализация при чтении)
+        self.parts = {}
+        self.finished = False
+        self.profiler = None
+        if cprofile:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def mark(self, name):
+        """Отмечает окончание этапа"""
+        self.marks.append((name, time.perf_counter()))
+
+    def add_part(self, name, seconds):
+        """Добавляет время части текущего этапа"""
+        self.parts[name] = self.parts.get(name, 0.0) + seconds
+
+    def report(self):
+        """Текст отчета: длительность каждого этапа и время от старта"""
+        lines = [f"Запуск {time.strftime('%Y-%m-%d %H:%M:%S')} (мс, от первой строки main.py):"]
+        previous = self.started_at
+        for name, moment in self.marks:
+            lines.append(f"  {name:28} {(moment - previous) * 1000:8.1f}  "
+                         f"{(moment - self.started_at) * 1000:8.1f}")
+            previous = moment
+        for name, seconds in self.parts.items():
+            lines.append(f"  в т.ч. {name:21} {seconds * 1000:8.1f}")
+        return "\n".join(lines)
+
+    def finish(self):
+        """Отмечает первую отрисовку и выводит отчет (один раз)"""
+        if self.finished:
+            return
+        self.finished = True
+        self.mark("первая отрисовка на экране")
+        text = self.report()
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            import io
+            import pstats
+            try:
+                self.profiler.dump_stats(PROFILE_FILE)
+                text += f"\nПолный профиль: {PROFILE_FILE} (python -m pstats)"
+            except OSError as e:
+                text += f"\nНе удалось сохранить профиль: {e}"
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats('cumulative').print_stats(PROFILE_TOP)
+            text += "\n" + stream.getvalue()
+
+        if self.to_log:
+            try:
+                os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+                with open(LOG_FILE, 'a', encoding='utf-8') as f:
+                    f.write(text + "\n\n")
+                return
+            except OSError as e:
+                print(f"Не удалось записать {LOG_FILE}: {e}", file=sys.stderr)
+        print(text, file=sys.stderr)
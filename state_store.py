@@ -0,0 +1,148 @@
+#state_store.py
+# Состояние программы в state.json: настройки, позиция навигации и
+# последняя выбранная строка каждой папки. Файл читается один раз при
+# запуске и перезаписывается атомарно, только если что-то изменилось
+import json
+import os
+import time
+
+import vault_storage
+
+# Сколько папок помнить выбранную строку (самые давние забываются)
+MAX_CURSORS = 500
+
+# Ключи позиции навигации в файле состояния
+POSITION_KEYS = ('folder_ids', 'selected_id', 'selected_index')
+
+
+def get_state_file():
+    """Путь к файлу состояния"""
+    return os.path.join(os.path.expanduser('~'), '.credmanager', 'state.json')
+
+
+class StateStore:
+    """Состояние программы в памяти с отложенной атомарной записью"""
+
+    def __init__(self, path=None):
+        self.path = path or get_state_file()
+        self.data = {}
+        # Время последнего сохранения позиции и отметка файла при чтении
+        self.saved_at = 0.0
+        self.stamp = None
+        # Ключи верхнего уровня, измененные после чтения
+        self.dirty = set()
+        self.load()
+
+    def load(self):
+        """Читает файл состояния (один open и один read)"""
+        self.data = {}
+        self.dirty = set()
+        try:
+            with open(self.path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                data = json.loads(f.read())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Ошибка чтения состояния: {e}")
+            return
+        if isinstance(data, dict):
+            self.data = data
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+        # Свежесть позиции - только по времени ее сохранения: файл
+        # перезаписывается и при изменении одних настроек
+        self.saved_at = self.data.get('timestamp', 0)
+
+    def set(self, key, value):
+        """Меняет значение верхнего уровня, отмечая его измененным"""
+        if self.data.get(key) != value:
+            self.data[key] = value
+            self.dirty.add(key)
+
+    def settings(self, defaults):
+        """Настройки поверх значений по умолчанию"""
+        return {**defaults, **(self.data.get('settings') or {})}
+
+    def set_settings(self, settings):
+        """Запоминает новые настройки"""
+        self.set('settings', dict(settings))
+
+    def position(self):
+        """Сохраненная позиция навигации и время ее сохранения"""
+        return {key: self.data.get(key) for key in POSITION_KEYS}, self.saved_at
+
+    def set_position(self, folder_ids, selected_id, selected_index):
+        """Запоминает позицию навигации"""
+        self.set('folder_ids', list(folder_ids))
+        self.set('selected_id', selected_id)
+        self.set('selected_index', selected_index)
+
+    def cursor(self, folder_id):
+        """Последняя выбранная строка папки (None - корень)"""
+        return (self.data.get('cursors') or {}).get(folder_id or "")
+
+    def remember_cursor(self, folder_id, selected_id):
+        """Запоминает выбранную строку папки"""
+        if not selected_id:
+            return
+        cursors = self.data.get('cursors') or {}
+        key = folder_id or ""
+        if cursors.get(key) == selected_id:
+            return
+        cursors = dict(cursors)
+        # Недавние папки - в конце, самые давние вытесняются первыми
+        cursors.pop(key, None)
+        cursors[key] = selected_id
+        while len(cursors) > MAX_CURSORS:
+            del cursors[next(iter(cursors))]
+        self.set('cursors', cursors)
+
+    def save(self, touch=False):
+        """Записывает состояние, если оно изменилось.
+
+        touch - отметить время сохранения позиции (для ее восстановления),
+        даже если ничего не изменилось. Запись без touch (например, только
+        настроек) это время не меняет.
+        """
+        now = time.time()
+        if touch:
+            self.data['timestamp'] = now
+            self.dirty.add('timestamp')
+            self.saved_at = now
+        if not self.dirty:
+            return
+
+        data = self.data
+        if self.stamp != self.current_stamp():
+            # Файл изменил другой экземпляр программы - переносим свои изменения на его версию
+            data = self.read_disk()
+            for key in self.dirty:
+                if key in self.data:
+                    data[key] = self.data[key]
+
+        try:
+            vault_storage.atomic_write_private(
+                self.path, json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8'))
+        except OSError as e:
+            print(f"Ошибка сохранения состояния: {e}")
+            return
+        self.data = data
+        self.dirty = set()
+        self.stamp = self.current_stamp()
+
+    def current_stamp(self):
+        """Отметка файла на диске (время изменения и размер)"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def read_disk(self):
+        """Текущее содержимое файла на диске"""
+        try:
+            with open(self.path, 'rb') as f:
+                data = json.loads(f.read())
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
@@ -0,0 +1,70 @@
+# API на Unix-сокете: обмен запросами через временный сокет
+import json
+import os
+import socket
+
+import pytest
+
+import vault_storage
+from api_server import ApiServer, peer_uid
+from query_server import VaultQueries
+from vault_journal import VaultJournal
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="нет Unix-сокетов")
+
+
+@pytest.fixture
+def server(tmp_path):
+    data_file = str(tmp_path / 'creds.json')
+    vault_storage.write_vault(data_file, [{'AWS': {'type': 'text', 'value': 'secret'}}])
+    journal = VaultJournal(data_file, read_only=True)
+    journal.load()
+    server = ApiServer(VaultQueries(journal), path=str(tmp_path / 'api.sock'))
+    assert server.start()
+    yield server
+    server.stop()
+
+
+def connect(server):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(5)
+    client.connect(server.path)
+    return client, client.makefile('rb')
+
+
+def ask(client, reader, request):
+    client.sendall(json.dumps(request).encode('utf-8') + b"\n")
+    return json.loads(reader.readline())
+
+
+def test_connection_is_reused_for_many_requests(server):
+    client, reader = connect(server)
+    with client, reader:
+        assert ask(client, reader, {'op': 'get', 'path': 'AWS', 'id': 1})['value'] == 'secret'
+        assert ask(client, reader, {'op': ['x']})['ok'] is False
+        # Массив запросов - массив ответов за один обмен
+        responses = ask(client, reader, [{'op': 'get', 'path': 'AWS'}, {'op': 'list', 'path': ''}])
+        assert [response['ok'] for response in responses] == [True, True]
+
+
+def test_connections_are_served_in_parallel(server):
+    first, first_reader = connect(server)
+    second, second_reader = connect(server)
+    with first, first_reader, second, second_reader:
+        # Первое соединение открыто и ждет, второе при этом отвечает
+        assert ask(second, second_reader, {'op': 'get', 'path': 'AWS'})['ok']
+        assert ask(first, first_reader, {'op': 'get', 'path': 'AWS'})['ok']
+
+
+def test_peer_is_same_user(server):
+    client, reader = connect(server)
+    with client, reader:
+        uid = peer_uid(client)
+        assert uid is None or uid == os.getuid()
+
+
+def test_stop_removes_socket(server):
+    server.stop()
+    assert not os.path.exists(server.path)
+    with pytest.raises(OSError):
+        connect(server)
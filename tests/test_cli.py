@@ -0,0 +1,62 @@
+# credmanager get: пути, коды завершения и файлы, которые команда не трогает
+import json
+import os
+
+import pytest
+
+import cli
+from vault_journal import get_journal_file
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = str(tmp_path / 'creds.json')
+    # Файл без заголовка: окно мигрировало бы его, get - только читает
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([
+            {'Work': [{'AWS': 'secret'}, {'a': [{'b': 'nested'}]}]},
+            {'Work/a/b': 'flat'},
+        ], f)
+    return path
+
+
+def files(tmp_path):
+    return {name: (tmp_path / name).read_bytes() for name in sorted(os.listdir(tmp_path))}
+
+
+def get(data_file, path, *flags):
+    return cli.main(['get', path, '--file', data_file, *flags])
+
+
+def test_prints_value(data_file, capsys):
+    assert get(data_file, 'Work/AWS', '-n') == 0
+    assert capsys.readouterr().out == 'secret'
+
+
+def test_missing_path(data_file, capsys):
+    assert get(data_file, 'Work/GCP') == cli.EXIT_NOT_FOUND
+    assert "не найдена" in capsys.readouterr().err
+
+
+def test_missing_file(tmp_path):
+    assert get(str(tmp_path / 'none.json'), 'Work/AWS') == cli.EXIT_NOT_FOUND
+
+
+def test_folder_is_not_a_value(data_file):
+    assert get(data_file, 'Work') == cli.EXIT_FAILED
+
+
+def test_ambiguous_path(data_file, capsys):
+    assert get(data_file, 'Work/a/b') == cli.EXIT_AMBIGUOUS
+    assert capsys.readouterr().out == ''
+
+
+def test_get_does_not_rewrite_vault(data_file, tmp_path):
+    before = files(tmp_path)
+    for path in ('Work/AWS', 'Work/GCP', 'Work/a/b', 'Work'):
+        get(data_file, path)
+    after = files(tmp_path)
+    # Может появиться только файл блокировки
+    after.pop('creds.lock', None)
+    assert after == before
+    assert not os.path.exists(get_journal_file(data_file))
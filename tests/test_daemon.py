@@ -0,0 +1,43 @@
+# Сокет фонового процесса: занятый не отнимается, оставшийся заменяется
+import errno
+import socket
+
+import pytest
+
+from daemon import close_unix_server, open_unix_server, socket_alive
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="нет Unix-сокетов")
+
+
+def test_live_socket_is_not_replaced(tmp_path):
+    path = str(tmp_path / 'daemon.sock')
+    first = open_unix_server(path)
+    try:
+        with pytest.raises(OSError) as raised:
+            open_unix_server(path)
+        assert raised.value.errno == errno.EADDRINUSE
+        assert socket_alive(path)
+    finally:
+        first.close()
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    path = str(tmp_path / 'daemon.sock')
+    # Процесс завершился аварийно и не удалил файл сокета
+    open_unix_server(path).close()
+    assert not socket_alive(path)
+
+    server = open_unix_server(path)
+    try:
+        assert socket_alive(path)
+    finally:
+        server.close()
+
+
+def test_close_removes_socket_file(tmp_path):
+    path = str(tmp_path / 'daemon.sock')
+    close_unix_server(open_unix_server(path), path)
+    assert not (tmp_path / 'daemon.sock').exists()
+
+    # Путь снова свободен
+    close_unix_server(open_unix_server(path), path)
@@ -0,0 +1,63 @@
+# Запросы JSON-строк, в том числе неверные
+import io
+import json
+
+import pytest
+
+import vault_storage
+from query_server import VaultQueries, serve_stdio
+from vault_journal import VaultJournal
+
+
+@pytest.fixture
+def queries(tmp_path):
+    data_file = str(tmp_path / 'creds.json')
+    vault_storage.write_vault(data_file, [
+        {'Work': {'type': 'folder', 'value': [
+            {'AWS': {'type': 'text', 'value': 'secret'}},
+        ]}},
+    ])
+    journal = VaultJournal(data_file, read_only=True)
+    journal.load()
+    return VaultQueries(journal)
+
+
+def ask(queries, request):
+    return json.loads(queries.handle_line(json.dumps(request)))
+
+
+def test_get_and_list(queries):
+    assert ask(queries, {'op': 'get', 'path': 'Work/AWS', 'id': 7}) == {
+        'id': 7, 'type': 'text', 'value': 'secret', 'ok': True}
+    entries = ask(queries, {'op': 'list', 'path': 'Work'})['entries']
+    assert [entry['name'] for entry in entries] == ['AWS']
+
+
+@pytest.mark.parametrize('request_', [
+    {'op': ['x']},
+    {'op': {}},
+    {'op': None},
+    {'op': 'drop'},
+    {'op': 'get'},
+    {'op': 'get', 'path': ['Work']},
+    {'op': 'get', 'path': 'Work'},
+    {'op': 'search', 'query': 'a', 'limit': 0},
+    {'op': 'search', 'query': 'a', 'limit': True},
+    ['get'],
+    'get',
+])
+def test_malformed_requests_are_errors(queries, request_):
+    response = ask(queries, request_)
+    if isinstance(request_, list):
+        response, = response
+    assert response['ok'] is False
+    assert response['error']
+
+
+def test_serve_stdio_survives_bad_lines(queries):
+    stdin = io.BytesIO(b'{"op": ["x"]}\nnot json\n\n{"op": "get", "path": "Work/AWS"}\n')
+    stdout = io.BytesIO()
+    serve_stdio(queries, stdin, stdout)
+    responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert [response['ok'] for response in responses] == [False, False, True]
+    assert responses[-1]['value'] == 'secret'
@@ -0,0 +1,53 @@
+# Поисковый индекс, обновляемый правками, против построенного заново
+import random
+
+from search_index import SearchIndex
+from vault_index import VaultIndex, split_record
+
+WORDS = ['mail', 'bank', 'aws', 'prod', 'db', 'gmail', 'vpn', 'git', 'ssh', 'root']
+QUERIES = ['a', 'ma', 'mail', 'b', 'pro', 'git', 'ss', 'o', 'x', 'db-']
+
+
+def random_name(rng):
+    return "-".join(rng.sample(WORDS, rng.randint(1, 3)))
+
+
+def fresh_results(vault_index, query):
+    fresh = SearchIndex(vault_index)
+    vault_index.listeners.remove(fresh)
+    return set(fresh.search(query, limit=10000))
+
+
+def test_incremental_updates_match_rebuild():
+    rng = random.Random(7)
+    data = [{random_name(rng): {'type': 'text', 'value': 'v'}} for _ in range(30)]
+    data.append({'folder': {'type': 'folder', 'value': []}})
+    vault_index = VaultIndex(data)
+    index = SearchIndex(vault_index)
+
+    for step in range(300):
+        node_ids = list(vault_index.nodes)
+        action = rng.random()
+        if action < 0.4 or len(node_ids) < 5:
+            folders = [None] + [node_id for node_id in node_ids
+                                if vault_index.nodes[node_id]['type'] == 'folder']
+            parent = rng.choice(folders)
+            node_type = 'folder' if rng.random() < 0.1 else 'text'
+            record = {random_name(rng): {'type': node_type, 'value': [] if node_type == 'folder' else 'v'}}
+            position = rng.randint(0, len(vault_index.children(parent)))
+            vault_index.apply({'op': 'insert', 'parent': parent, 'index': position, 'record': record})
+        elif action < 0.7:
+            node_id = rng.choice(node_ids)
+            node = vault_index.nodes[node_id]
+            vault_index.apply({'op': 'edit', 'id': node_id, 'name': random_name(rng),
+                               'type': node['type'], 'value': node.get('value')})
+        else:
+            vault_index.apply({'op': 'delete', 'id': rng.choice(node_ids)})
+
+        # Поиск между правками, чтобы общая строка уже была построена
+        query = rng.choice(QUERIES)
+        assert set(index.search(query, limit=10000)) == fresh_results(vault_index, query), step
+
+    names = {node_id: split_record(vault_index.records[node_id])[0].lower()
+             for node_id in vault_index.nodes}
+    assert index.names == names
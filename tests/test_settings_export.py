@@ -0,0 +1,90 @@
+# Модель выбора вкладки экспорта: счетчики трех состояний без окна Tk
+import pytest
+
+from settings_export import ExportTab
+
+
+class FakeTree:
+    """Treeview с текстом строк; раскрытие и выбор мышью не нужны"""
+
+    def __init__(self):
+        self.texts = {}
+
+    def insert(self, parent, index, text, values):
+        iid = f"I{len(self.texts)}"
+        self.texts[iid] = text
+        return iid
+
+    def get_children(self, item=""):
+        return []
+
+    def delete(self, *iids):
+        pass
+
+    def item(self, iid, text, tags=()):
+        self.texts[iid] = text
+
+
+def leaf(value):
+    return {'type': 'text', 'value': value, 'id': f"id-{value}"}
+
+
+@pytest.fixture
+def tab():
+    tab = ExportTab.__new__(ExportTab)
+    tab.data = [
+        {'F': {'type': 'folder', 'id': 'id-F', 'value': [
+            {'a': leaf('1')},
+            {'S': {'type': 'folder', 'id': 'id-S', 'value': [{'c': leaf('3')}]}},
+        ]}},
+        {'x': leaf('4')},
+    ]
+    tab.tree = FakeTree()
+    tab.populate_tree()
+    return tab
+
+
+def item(tab, key):
+    return next(iid for iid, info in tab.tree_items.items() if info['key'] == key)
+
+
+def mark(tab, key):
+    return tab.check_mark(tab.tree_items[item(tab, key)])[0]
+
+
+def test_folder_counts_descendants(tab):
+    assert tab.tree_items[item(tab, 'F')]['descendants'] == 3
+    assert tab.tree_items[item(tab, 'S')]['descendants'] == 1
+
+
+def test_child_selects_parents_partially(tab):
+    tab.select_item_with_parents(item(tab, 'c'))
+    assert (mark(tab, 'c'), mark(tab, 'S'), mark(tab, 'F'), mark(tab, 'x')) == ("☑", "☑", "▣", "☐")
+    assert tab.tree_items[item(tab, 'F')]['selected_below'] == 2
+    # Строка корня перерисована сразу
+    assert tab.tree.texts[item(tab, 'F')] == "▣ F"
+
+
+def test_toggle_folder_then_child(tab):
+    folder = item(tab, 'F')
+    tab.select_item_recursive(folder)
+    assert {mark(tab, key) for key in ('F', 'a', 'S', 'c')} == {"☑"}
+    assert tab.tree_items[folder]['selected_below'] == 3
+
+    tab.deselect_item_recursive(item(tab, 'a'))
+    assert mark(tab, 'F') == "▣"
+    assert tab.tree_items[folder]['selected_below'] == 2
+
+    tab.select_item_recursive(item(tab, 'a'))
+    assert mark(tab, 'F') == "☑"
+
+    tab.deselect_item_recursive(folder)
+    assert all(not info['selected'] and not info['selected_below'] for info in tab.tree_items.values())
+    assert mark(tab, 'F') == "☐"
+
+
+def test_export_keeps_selected_branch_without_ids(tab):
+    tab.select_item_with_parents(item(tab, 'a'))
+    assert tab.build_export_data() == [
+        {'F': {'type': 'folder', 'value': [{'a': {'type': 'text', 'value': '1'}}]}},
+    ]
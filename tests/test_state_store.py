@@ -0,0 +1,64 @@
+#test_state_store.py
+# Два экземпляра программы с одним state.json
+import json
+
+from state_store import StateStore
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_touch_keeps_other_instance_settings(tmp_path):
+    path = str(tmp_path / 'state.json')
+    first = StateStore(path)
+    first.set_position([], 'a', 0)
+    first.save(touch=True)
+
+    second = StateStore(path)
+    second.set_settings({'clipboard_ttl': 5})
+    second.save()
+
+    # Позиция не менялась - обновляется только время ее сохранения
+    first.save(touch=True)
+    first.set_position(['folder'], 'b', 1)
+    first.save(touch=True)
+
+    data = read(path)
+    assert data['settings'] == {'clipboard_ttl': 5}
+    assert data['folder_ids'] == ['folder']
+    assert first.settings({})['clipboard_ttl'] == 5
+
+
+def test_dirty_saves_merge_keys(tmp_path):
+    path = str(tmp_path / 'state.json')
+    first = StateStore(path)
+    second = StateStore(path)
+
+    first.remember_cursor(None, 'x')
+    first.save()
+    second.set_settings({'save_position': False})
+    second.save()
+    first.remember_cursor('folder', 'y')
+    first.save()
+
+    data = read(path)
+    assert data['settings'] == {'save_position': False}
+    assert data['cursors'] == {'': 'x', 'folder': 'y'}
+
+
+def test_settings_save_does_not_refresh_position(tmp_path):
+    path = str(tmp_path / 'state.json')
+    window = StateStore(path)
+    window.set_position(['folder'], 'a', 0)
+    window.save(touch=True)
+    _, saved_at = StateStore(path).position()
+
+    settings = StateStore(path)
+    settings.set_settings({'clipboard_ttl': 5})
+    settings.save()
+
+    position, reloaded_at = StateStore(path).position()
+    assert reloaded_at == saved_at
+    assert position['selected_id'] == 'a'
@@ -0,0 +1,68 @@
+#test_totp.py
+# Коды TOTP по тестовым векторам RFC 4226 и RFC 6238 (SHA1)
+import base64
+
+import pytest
+
+from totp import TotpEngine, decode_secret, generate_code, current_step, seconds_remaining
+
+# Секрет из приложений RFC: ASCII "12345678901234567890"
+RFC_KEY = b"12345678901234567890"
+RFC_SECRET = base64.b32encode(RFC_KEY).decode()
+
+# RFC 4226, приложение D: HOTP для счетчиков 0..9
+HOTP_CODES = ["755224", "287082", "359152", "969429", "338314",
+              "254676", "287922", "162583", "399871", "520489"]
+
+# RFC 6238, приложение B (SHA1): восьмизначные коды, у нас - последние 6 цифр
+TOTP_VECTORS = [
+    (59, "94287082"),
+    (1111111109, "07081804"),
+    (1111111111, "14050471"),
+    (1234567890, "89005924"),
+    (2000000000, "69279037"),
+    (20000000000, "65353130"),
+]
+
+
+@pytest.mark.parametrize("counter, expected", list(enumerate(HOTP_CODES)))
+def test_hotp_vectors(counter, expected):
+    assert generate_code(RFC_KEY, counter) == expected
+
+
+@pytest.mark.parametrize("now, expected", TOTP_VECTORS)
+def test_totp_vectors(now, expected):
+    assert TotpEngine().code(RFC_SECRET, current_step(now)) == expected[-6:]
+
+
+def test_secret_without_padding():
+    # 7 байт - 12 символов base32 и 4 '=', которые часто не пишут
+    key = b"1234567"
+    secret = base64.b32encode(key).decode()
+    assert secret.endswith("====")
+    assert decode_secret(secret.rstrip("=")) == key
+    assert decode_secret(secret) == key
+
+
+def test_lowercase_secret():
+    assert decode_secret(RFC_SECRET.lower()) == RFC_KEY
+    engine = TotpEngine()
+    assert engine.code(RFC_SECRET.lower(), 1) == engine.code(RFC_SECRET, 1) == HOTP_CODES[1]
+
+
+def test_invalid_secret():
+    engine = TotpEngine()
+    assert engine.code("not base32 !", 1) is None
+    assert engine.codes(["1", RFC_SECRET], 0) == {"1": None, RFC_SECRET: HOTP_CODES[0]}
+
+
+def test_past_step_keeps_current_cache():
+    engine = TotpEngine()
+    assert engine.code(RFC_SECRET, 5) == HOTP_CODES[5]
+    assert engine.code(RFC_SECRET, 3) == HOTP_CODES[3]
+    assert engine.step == 5 and engine.step_codes[RFC_SECRET] == HOTP_CODES[5]
+
+
+def test_seconds_remaining():
+    assert seconds_remaining(59) == 1
+    assert seconds_remaining(60) == 30
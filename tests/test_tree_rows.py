@@ -0,0 +1,190 @@
+# Согласование строк Treeview и окно строк больших папок на поддельном дереве
+import random
+from collections import Counter
+
+import pytest
+
+from tree_rows import DEFAULT_VISIBLE_ROWS, OVERSCAN, TreeRows, stable_items
+
+
+class FakeTree:
+    """Плоский Treeview: строки, выбор и счетчик вызовов, меняющих строки"""
+
+    def __init__(self):
+        self.rows = []
+        self.texts = {}
+        self.values = {}
+        self.selected = ()
+        self.calls = Counter()
+
+    def insert(self, parent, index, iid, text, values):
+        self.calls['insert'] += 1
+        self.rows.insert(index, iid)
+        self.texts[iid] = text
+        self.values[iid] = values
+
+    def delete(self, *iids):
+        self.calls['delete'] += 1
+        for iid in iids:
+            self.rows.remove(iid)
+        self.selected = tuple(iid for iid in self.selected if iid not in iids)
+
+    def move(self, iid, parent, index):
+        self.calls['move'] += 1
+        self.rows.remove(iid)
+        self.rows.insert(index, iid)
+
+    def item(self, iid, text=None, values=None):
+        self.calls['item'] += 1
+        if text is not None:
+            self.texts[iid] = text
+        if values is not None:
+            self.values[iid] = values
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, iid):
+        self.selected = (iid,)
+
+    def focus(self, iid):
+        pass
+
+    def see(self, iid):
+        pass
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def yview(self):
+        return (0.0, 1.0)
+
+    def winfo_height(self):
+        # Окно еще не отрисовано - видно DEFAULT_VISIBLE_ROWS строк
+        return 1
+
+
+def make_items(names):
+    return [(name, name.upper(), name) for name in names]
+
+
+def show(rows, names):
+    rows.tree.calls.clear()
+    rows.show(make_items(names), str)
+    return rows.tree.calls
+
+
+def check_tree(rows, names):
+    tree = rows.tree
+    assert tree.rows == names
+    assert rows.order == names
+    for name in names:
+        assert tree.texts[name] == name.upper()
+        assert tree.values[name] == (name,)
+
+
+@pytest.fixture
+def rows():
+    return TreeRows(FakeTree())
+
+
+def test_stable_items_is_longest_increasing_run():
+    assert stable_items([]) == set()
+    assert stable_items([0, 1, 2]) == {0, 1, 2}
+    assert stable_items([2, 0, 1]) == {1, 2}
+    assert len(stable_items([3, 1, 0, 2, 4])) == 3
+
+
+def test_unchanged_list_makes_no_calls(rows):
+    names = list("abcdef")
+    show(rows, names)
+    assert sum(show(rows, names).values()) == 0
+
+
+def test_moving_one_row_is_one_move(rows):
+    show(rows, list("abcdef"))
+    calls = show(rows, list("abdecf"))
+    assert calls == Counter(move=1)
+    check_tree(rows, list("abdecf"))
+
+
+def test_rename_is_one_item_call(rows):
+    show(rows, list("abc"))
+    rows.tree.calls.clear()
+    rows.show([('a', 'A', 'a'), ('b', 'renamed', 'b'), ('c', 'C', 'c')], str)
+    assert rows.tree.calls == Counter(item=1)
+    assert rows.tree.texts['b'] == 'renamed'
+
+
+def test_random_edits_end_in_items_order(rows):
+    rng = random.Random(3)
+    pool = [f"r{i}" for i in range(40)]
+    names = rng.sample(pool, 20)
+    show(rows, names)
+    for _ in range(200):
+        names = names[:]
+        action = rng.random()
+        missing = [name for name in pool if name not in names]
+        if action < 0.3 and missing:
+            names.insert(rng.randint(0, len(names)), rng.choice(missing))
+        elif action < 0.5 and names:
+            names.remove(rng.choice(names))
+        elif action < 0.8 and names:
+            name = names.pop(rng.randrange(len(names)))
+            names.insert(rng.randint(0, len(names)), name)
+        else:
+            rng.shuffle(names)
+        show(rows, names)
+        check_tree(rows, names)
+
+
+def test_window_holds_only_visible_rows(rows):
+    names = [f"r{i:04}" for i in range(1000)]
+    show(rows, names)
+    assert rows.is_virtual()
+    check_tree(rows, names[:DEFAULT_VISIBLE_ROWS + OVERSCAN])
+    assert len(rows) == 1000
+
+
+def test_scroll_clamps_start(rows):
+    names = [f"r{i:04}" for i in range(1000)]
+    show(rows, names)
+    rows.scroll(10000)
+    assert rows.start == 1000 - DEFAULT_VISIBLE_ROWS
+    assert rows.tree.rows[-1] == names[-1]
+    rows.scroll(-10000)
+    assert rows.start == 0
+    assert rows.tree.rows[0] == names[0]
+
+
+def test_select_moves_window_to_row(rows):
+    names = [f"r{i:04}" for i in range(1000)]
+    show(rows, names)
+    assert rows.select('r0700')
+    assert rows.start == 700 - DEFAULT_VISIBLE_ROWS + 1
+    assert 'r0700' in rows.tree.rows
+    assert rows.tree.selection() == ('r0700',)
+
+    # Выше окна - строка становится первой
+    rows.select('r0100')
+    assert rows.start == 100
+    assert not rows.select('missing')
+
+
+def test_selection_survives_window_moves(rows):
+    names = [f"r{i:04}" for i in range(1000)]
+    show(rows, names)
+    rows.select('r0005')
+    rows.scroll(100)
+    assert 'r0005' not in rows.tree.rows
+    assert rows.selection() == 'r0005'
+
+    rows.scroll(-100)
+    assert rows.tree.selection() == ('r0005',)
+
+
+def test_small_list_is_not_windowed(rows):
+    names = [f"r{i:03}" for i in range(100)]
+    show(rows, names)
+    assert not rows.scroll(10)
+    check_tree(rows, names)
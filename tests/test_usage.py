@@ -0,0 +1,31 @@
+#test_usage.py
+# Статистика использования из нескольких процессов с одним usage.bin
+import pytest
+
+from usage import UsageStore
+
+
+def test_instances_merge_counts(tmp_path):
+    path = str(tmp_path / 'usage.bin')
+    window = UsageStore(path)
+    daemon = UsageStore(path)
+
+    window.record('a', now=1000.0)
+    daemon.record('b', now=1000.0)
+    daemon.record('a', now=1000.0)
+    window.record('a', now=1000.0)
+
+    scores = UsageStore(path).scores(now=1000.0)
+    assert scores['a'] == pytest.approx(3.0)
+    assert scores['b'] == pytest.approx(1.0)
+    # Сохранение подтягивает и чужие записи
+    assert window.scores(now=1000.0) == scores
+
+
+def test_save_without_new_uses_keeps_file(tmp_path):
+    path = str(tmp_path / 'usage.bin')
+    UsageStore(path).record('a', now=1000.0)
+    stale = UsageStore(str(tmp_path / 'other.bin'))
+    stale.path = path
+    stale.save(now=1000.0)
+    assert UsageStore(path).scores(now=1000.0)['a'] == pytest.approx(1.0)
@@ -0,0 +1,175 @@
+# Снимок creds.json и журнал операций: воспроизведение, сбои, миграция
+# и дозапись из нескольких процессов
+import json
+import multiprocessing
+
+import pytest
+
+import vault_journal
+import vault_storage
+from vault_index import split_record
+from vault_journal import VaultJournal, get_journal_file
+
+
+def text(name, value):
+    return {name: {'type': 'text', 'value': value}}
+
+
+def names(records):
+    return [split_record(record)[0] for record in records]
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def journal_lines(data_file):
+    with open(get_journal_file(data_file), 'rb') as f:
+        return [json.loads(line) for line in f.read().splitlines()]
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = str(tmp_path / 'creds.json')
+    vault_storage.write_vault(path, [text('a', '1'), text('b', '2')])
+    return path
+
+
+def open_journal(data_file):
+    journal = VaultJournal(data_file)
+    journal.load()
+    return journal
+
+
+def test_replay_applies_operations_over_snapshot(data_file):
+    journal = open_journal(data_file)
+    snapshot = read_json(data_file)
+    a_id = journal.index.resolve('a')
+    journal.apply({'op': 'insert', 'parent': None, 'index': 2, 'record': text('c', '3')})
+    journal.apply({'op': 'edit', 'id': a_id, 'name': 'a2', 'type': 'text', 'value': 'x'})
+    journal.close()
+
+    # Правки только дописаны в журнал, снимок не переписывался
+    assert read_json(data_file) == snapshot
+    assert [line['seq'] for line in journal_lines(data_file)[1:]] == [1, 2]
+
+    reloaded = open_journal(data_file)
+    assert names(reloaded.data) == ['a2', 'b', 'c']
+    assert reloaded.index.nodes[a_id]['value'] == 'x'
+    assert reloaded.seq == 2
+
+
+def test_torn_last_line_is_skipped_and_truncated(data_file):
+    journal = open_journal(data_file)
+    journal.apply({'op': 'insert', 'parent': None, 'index': 0, 'record': text('c', '3')})
+    journal.close()
+    with open(get_journal_file(data_file), 'ab') as f:
+        f.write(b'{"op": "delete", "id": "')
+
+    reloaded = open_journal(data_file)
+    assert names(reloaded.data) == ['c', 'a', 'b']
+
+    # Следующая дозапись отрезает обрывок, а не склеивается с ним
+    reloaded.apply({'op': 'delete', 'id': reloaded.index.resolve('b')})
+    reloaded.close()
+    assert [line['seq'] for line in journal_lines(data_file)[1:]] == [1, 2]
+    assert names(open_journal(data_file).data) == ['c', 'a']
+
+
+def test_moves_of_one_record_coalesce(data_file):
+    journal = open_journal(data_file)
+    node_id = journal.index.resolve('a')
+    journal.enqueue({'op': 'move', 'id': node_id, 'from': 0, 'to': 1})
+    journal.enqueue({'op': 'move', 'id': node_id, 'from': 1, 'to': 2})
+    assert journal.pending == [{'op': 'move', 'id': node_id, 'from': 0, 'to': 2}]
+
+    # Вернулась на прежнее место - записывать нечего
+    journal.enqueue({'op': 'move', 'id': node_id, 'from': 2, 'to': 0})
+    assert journal.pending == []
+
+
+def test_insert_then_delete_cancels_out(data_file):
+    journal = open_journal(data_file)
+    record = {'c': {'type': 'text', 'value': '3', 'id': 'c1'}}
+    journal.enqueue({'op': 'insert', 'parent': None, 'index': 0, 'record': record})
+    journal.enqueue({'op': 'delete', 'id': 'c1'})
+    assert journal.pending == []
+
+
+def test_seq_continues_after_compaction(data_file, monkeypatch):
+    monkeypatch.setattr(vault_journal, 'JOURNAL_COMPACT_BYTES', 1)
+    journal = open_journal(data_file)
+    journal_id = journal.journal_id
+    journal.apply({'op': 'insert', 'parent': None, 'index': 0, 'record': text('c', '3')})
+    journal.flush()
+
+    # Журнал свернут в снимок, номер операции в нем сохранен
+    document = read_json(data_file)
+    assert document['journal'] == {'id': journal_id, 'seq': 1}
+    assert journal_lines(data_file) == [{'journal': journal_id, 'seq': 1}]
+
+    monkeypatch.setattr(vault_journal, 'JOURNAL_COMPACT_BYTES', 1 << 20)
+    journal.apply({'op': 'delete', 'id': journal.index.resolve('a')})
+    journal.close()
+    assert [line['seq'] for line in journal_lines(data_file)[1:]] == [2]
+    assert names(open_journal(data_file).data) == ['c', 'b']
+
+
+def test_journal_of_another_snapshot_is_ignored(data_file):
+    with open(get_journal_file(data_file), 'wb') as f:
+        f.write(b'{"journal": "other", "seq": 0}\n')
+        f.write(b'{"op": "delete", "id": "x", "seq": 1}\n')
+    journal = open_journal(data_file)
+    assert names(journal.data) == ['a', 'b']
+
+    # Новые правки начинают журнал этого снимка
+    journal.apply({'op': 'insert', 'parent': None, 'index': 0, 'record': text('c', '3')})
+    journal.close()
+    assert journal_lines(data_file)[0]['journal'] == read_json(data_file)['journal']['id']
+    assert names(open_journal(data_file).data) == ['c', 'a', 'b']
+
+
+def test_legacy_file_is_migrated_once_with_ids(tmp_path):
+    data_file = str(tmp_path / 'creds.json')
+    with open(data_file, 'w', encoding='utf-8') as f:
+        json.dump([{'a': '1'}, {'F': [{'b': '2'}]}], f)
+
+    journal = open_journal(data_file)
+    document = read_json(data_file)
+    assert document['format_version'] == vault_storage.FORMAT_VERSION
+    folder = document['records'][1]['F']
+    assert folder['type'] == 'folder'
+    assert folder['value'][0]['b'] == {'type': 'text', 'value': '2', 'id': folder['value'][0]['b']['id']}
+
+    # Выданные id сохранены и при следующей загрузке не меняются
+    reloaded = open_journal(data_file)
+    assert set(reloaded.index.nodes) == set(journal.index.nodes)
+    assert len(reloaded.index.nodes) == 3
+    assert read_json(data_file) == document
+
+
+def append_records(data_file, prefix, count):
+    journal = open_journal(data_file)
+    for number in range(count):
+        journal.apply({'op': 'insert', 'parent': None, 'index': 0,
+                       'record': text(f'{prefix}{number}', str(number))})
+        journal.flush()
+    journal.close()
+
+
+@pytest.mark.skipif(vault_storage.fcntl is None, reason="нет flock")
+def test_processes_append_without_losing_operations(data_file):
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=append_records, args=(data_file, prefix, 20))
+               for prefix in ('x', 'y')]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    journal = open_journal(data_file)
+    assert len(journal.data) == 42
+    seqs = [line['seq'] for line in journal_lines(data_file)[1:]]
+    assert seqs == list(range(1, 41))
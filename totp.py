@@ -0,0 +1,89 @@
+#totp.py
+# Генерация TOTP-кодов (RFC 6238, как pyotp по умолчанию: SHA1, 6 цифр,
+# шаг 30 секунд). Секреты декодируются один раз, коды кэшируются на
+# текущий шаг времени, неверные секреты запоминаются
+import base64
+import binascii
+import hashlib
+import hmac
+import struct
+import time
+
+# Длина шага времени в секундах и число цифр кода
+INTERVAL = 30
+DIGITS = 6
+
+
+def decode_secret(secret):
+    """Декодирует base32-секрет (без учета регистра, с досыпанием '=')"""
+    missing_padding = len(secret) % 8
+    if missing_padding:
+        secret += '=' * (8 - missing_padding)
+    return base64.b32decode(secret, casefold=True)
+
+
+def generate_code(key, step):
+    """Код для ключа и номера шага времени"""
+    digest = hmac.new(key, struct.pack(">Q", step), hashlib.sha1).digest()
+    offset = digest[-1] & 0x0F
+    value = struct.unpack(">I", digest[offset:offset + 4])[0] & 0x7FFFFFFF
+    return str(value % 10 ** DIGITS).zfill(DIGITS)
+
+
+def current_step(now=None):
+    """Номер текущего шага времени"""
+    return int((time.time() if now is None else now) // INTERVAL)
+
+
+def seconds_remaining(now=None):
+    """Сколько секунд осталось до смены кода"""
+    now = time.time() if now is None else now
+    return INTERVAL - int(now) % INTERVAL
+
+
+class TotpEngine:
+    """Коды TOTP с кэшем декодированных секретов и кодов текущего шага"""
+
+    def __init__(self):
+        # секрет -> ключ (None - секрет неверный)
+        self.keys = {}
+        # Коды одного шага времени: секрет -> код
+        self.step = None
+        self.step_codes = {}
+
+    def key(self, secret):
+        """Декодированный ключ или None для неверного секрета"""
+        try:
+            return self.keys[secret]
+        except KeyError:
+            pass
+        try:
+            key = decode_secret(secret)
+        except (binascii.Error, ValueError, TypeError):
+            key = None
+        self.keys[secret] = key
+        return key
+
+    def code(self, secret, step=None):
+        """Код для секрета на шаге step (по умолчанию текущем) или None"""
+        step = current_step() if step is None else step
+        if step != self.step:
+            if self.step is not None and step < self.step:
+                # Запрос за прошлый шаг - не трогаем кэш текущего
+                key = self.key(secret)
+                return None if key is None else generate_code(key, step)
+            self.step = step
+            self.step_codes = {}
+        try:
+            return self.step_codes[secret]
+        except KeyError:
+            pass
+        key = self.key(secret)
+        code = None if key is None else generate_code(key, step)
+        self.step_codes[secret] = code
+        return code
+
+    def codes(self, secrets, step=None):
+        """Коды для нескольких секретов на одном шаге: секрет -> код или None"""
+        step = current_step() if step is None else step
+        return {secret: self.code(secret, step) for secret in secrets}
@@ -0,0 +1,249 @@
+#tree_rows.py
+# Согласование строк Treeview со списком записей: вместо полной
+# перерисовки вставляются, удаляются, перемещаются и переименовываются
+# только изменившиеся строки. В больших папках в дереве живет только
+# видимое окно строк, а значения считаются при прокрутке
+import bisect
+import math
+
+# Папки больше этого размера показываются окном строк
+VIRTUAL_THRESHOLD = 500
+
+# Высота строки в пикселях, если ее не дают ни строки, ни стиль, и число
+# строк до отрисовки окна
+DEFAULT_ROW_HEIGHT = 20
+DEFAULT_VISIBLE_ROWS = 25
+
+# Сколько строк держать в дереве ниже видимой части
+OVERSCAN = 10
+
+
+def stable_items(old_positions):
+    """Индексы элементов, образующих наибольшую возрастающую подпоследовательность.
+
+    Эти строки уже стоят в нужном порядке и не перемещаются.
+    """
+    tails = []
+    tail_indexes = []
+    previous = [None] * len(old_positions)
+    for i, position in enumerate(old_positions):
+        k = bisect.bisect_left(tails, position)
+        if k == len(tails):
+            tails.append(position)
+            tail_indexes.append(i)
+        else:
+            tails[k] = position
+            tail_indexes[k] = i
+        previous[i] = tail_indexes[k - 1] if k > 0 else None
+
+    stable = set()
+    i = tail_indexes[-1] if tail_indexes else None
+    while i is not None:
+        stable.add(i)
+        i = previous[i]
+    return stable
+
+
+class TreeRows:
+    """Строки верхнего уровня Treeview и их копия для сравнения"""
+
+    def __init__(self, tree):
+        self.tree = tree
+        # Порядок строк в дереве и (имя, значение) каждой строки
+        self.order = []
+        self.labels = {}
+        # Все строки текущего списка (iid, имя, запись) и функция текста значения
+        self.items = []
+        self.positions = {}
+        self.format_value = str
+        # Первая строка окна и последняя выбранная строка (может быть вне окна)
+        self.start = 0
+        self.selected = None
+        # Отступ первой строки под заголовком столбцов и высота строки,
+        # измеренные по дереву (зависят от шрифта и масштаба экрана)
+        self.geometry = None
+
+    def show(self, items, format_value):
+        """Показывает список строк (iid, имя, запись); значения - format_value(запись)"""
+        self.remember_selection()
+        self.items = items
+        self.positions = {item[0]: position for position, item in enumerate(items)}
+        self.format_value = format_value
+        self.refresh()
+
+    def is_virtual(self):
+        """Показывается ли список окном строк"""
+        return len(self.items) > VIRTUAL_THRESHOLD
+
+    def visible_rows(self):
+        """Сколько строк помещается в дереве"""
+        height = self.tree.winfo_height()
+        if height <= 1:
+            # Окно еще не отрисовано
+            return DEFAULT_VISIBLE_ROWS
+        top, row_height = self.row_geometry()
+        return max((height - top) // row_height, 1)
+
+    def row_geometry(self):
+        """Отступ первой строки (заголовок столбцов) и высота строки в пикселях.
+
+        Измеряются по первой строке, пока она видна; до этого высота берется
+        из стиля Treeview, а заголовок считается равным строке.
+        """
+        if self.order:
+            bbox = self.tree.bbox(self.order[0])
+            if bbox:
+                self.geometry = (bbox[1], bbox[3])
+        if self.geometry is not None:
+            return self.geometry
+        row_height = self.style_row_height()
+        return row_height, row_height
+
+    def style_row_height(self):
+        """Высота строки по стилю Treeview или по шрифту"""
+        from tkinter import TclError, font, ttk
+        try:
+            height = ttk.Style(self.tree).lookup(self.tree.cget('style') or 'Treeview', 'rowheight')
+            if height:
+                return int(height)
+            # Тема не задает высоту - Tk считает ее по шрифту
+            return font.nametofont('TkDefaultFont', root=self.tree).metrics('linespace') + 2
+        except (ValueError, TclError):
+            return DEFAULT_ROW_HEIGHT
+
+    def refresh(self):
+        """Отрисовывает окно строк, начиная со start"""
+        self.remember_selection()
+        if self.is_virtual():
+            self.start = max(min(self.start, len(self.items) - self.visible_rows()), 0)
+            window = self.items[self.start:self.start + self.visible_rows() + OVERSCAN]
+        else:
+            self.start = 0
+            window = self.items
+        self.render([(iid, text, self.format_value(value)) for iid, text, value in window])
+
+        if self.is_virtual():
+            # Первая строка окна всегда вверху дерева
+            self.tree.yview_moveto(0)
+        if self.selected in self.labels and self.selected not in self.tree.selection():
+            self.tree.selection_set(self.selected)
+            self.tree.focus(self.selected)
+
+    def scroll(self, delta):
+        """Прокручивает окно на delta строк; False, если список не оконный"""
+        if not self.is_virtual():
+            return False
+        self.start += delta
+        self.refresh()
+        return True
+
+    def visible_ids(self):
+        """iid строк, которые сейчас видны в дереве"""
+        first, last = self.tree.yview()
+        count = len(self.order)
+        return self.order[int(first * count):math.ceil(last * count)]
+
+    def update_values(self, iids):
+        """Пересчитывает значения строк на месте, меняя в дереве только изменившиеся"""
+        for iid in iids:
+            position = self.positions.get(iid)
+            if position is None or iid not in self.labels:
+                continue
+            text, value = self.items[position][1], self.format_value(self.items[position][2])
+            if self.labels[iid] != (text, value):
+                self.tree.item(iid, values=(value,))
+                self.labels[iid] = (text, value)
+
+    def remember_selection(self):
+        """Запоминает выбранную строку, пока она еще есть в дереве"""
+        selection = self.tree.selection()
+        if selection:
+            self.selected = selection[0]
+
+    def selection(self):
+        """iid выбранной строки, даже если она прокручена за пределы окна"""
+        selection = self.tree.selection()
+        if selection:
+            return selection[0]
+        return self.selected if self.selected in self.positions else None
+
+    def ids(self):
+        """iid всех строк списка"""
+        return [item[0] for item in self.items]
+
+    def index(self, iid):
+        """Позиция строки в списке"""
+        return self.positions[iid]
+
+    def __contains__(self, iid):
+        return iid in self.positions
+
+    def __len__(self):
+        return len(self.items)
+
+    def select(self, iid):
+        """Выбирает строку, при необходимости сдвигая к ней окно"""
+        position = self.positions.get(iid)
+        if position is None:
+            return False
+        self.selected = iid
+        if self.is_virtual():
+            visible = self.visible_rows()
+            start = self.start
+            if position < start:
+                start = position
+            elif position >= start + visible:
+                start = position - visible + 1
+            if start != self.start:
+                self.start = start
+                self.refresh()
+        self.tree.selection_set(iid)
+        self.tree.focus(iid)
+        self.tree.see(iid)
+        return True
+
+    def render(self, rows):
+        """Приводит дерево к списку строк (iid, имя, значение) за минимум вызовов Tk"""
+        wanted = {iid for iid, text, value in rows}
+        gone = [iid for iid in self.order if iid not in wanted]
+        if gone:
+            self.tree.delete(*gone)
+            for iid in gone:
+                del self.labels[iid]
+            self.order = [iid for iid in self.order if iid in wanted]
+
+        # Строки, уже стоящие в нужном взаимном порядке, остаются на месте
+        old_positions = {iid: position for position, iid in enumerate(self.order)}
+        kept = [i for i, (iid, text, value) in enumerate(rows) if iid in old_positions]
+        positions = [old_positions[rows[i][0]] for i in kept]
+        if all(a < b for a, b in zip(positions, positions[1:])):
+            # Частый случай: порядок не менялся
+            stable = set(kept)
+        else:
+            stable = {kept[i] for i in stable_items(positions)}
+
+        # Позиция последней поставленной строки (None - неизвестна)
+        placed = -1
+        for i, (iid, text, value) in enumerate(rows):
+            label = (text, value)
+            if i not in stable:
+                # Ставим строку сразу после предыдущей в новом порядке
+                if iid in self.labels:
+                    self.order.remove(iid)
+                    placed = None
+                if placed is None:
+                    placed = self.order.index(rows[i - 1][0]) if i > 0 else -1
+                position = placed + 1
+                placed = position
+                self.order.insert(position, iid)
+                if iid in self.labels:
+                    self.tree.move(iid, "", position)
+                else:
+                    self.tree.insert("", position, iid=iid, text=text, values=(value,))
+                    self.labels[iid] = label
+                    continue
+            else:
+                placed = None
+            if self.labels[iid] != label:
+                self.tree.item(iid, text=text, values=(value,))
+                self.labels[iid] = label
@@ -0,0 +1,125 @@
+#usage.py
+# Частота и давность использования записей (frecency): компактный
+# двоичный файл с затухающим счетом для каждого id записи
+import math
+import os
+import struct
+import time
+
+import vault_storage
+
+# Заголовок файла: сигнатура и версия формата
+MAGIC = b"CMU1"
+
+# Запись: id (ascii, до 12 байт), счет и время последнего обновления счета
+ENTRY = struct.Struct("<12sdd")
+
+# За сколько секунд счет уменьшается вдвое
+HALF_LIFE = 7 * 24 * 3600
+
+# Записи со счетом ниже этого порога забываются (одно использование - через ~месяц)
+MIN_SCORE = 0.05
+
+# Больше записей не хранится - остаются с наибольшим счетом
+MAX_ENTRIES = 256
+
+
+def get_usage_file():
+    """Путь к файлу статистики использования"""
+    return os.path.join(os.path.expanduser('~'), '.credmanager', 'usage.bin')
+
+
+def decay(score, stamp, now):
+    """Счет, уменьшенный на время, прошедшее с момента stamp"""
+    return score * math.pow(2.0, -max(now - stamp, 0.0) / HALF_LIFE)
+
+
+def read_entries(path):
+    """Записи файла статистики: id -> (счет, время); {} - файла нет или он поврежден"""
+    try:
+        with open(path, 'rb') as f:
+            blob = f.read()
+    except OSError:
+        return {}
+    if not blob.startswith(MAGIC) or (len(blob) - len(MAGIC)) % ENTRY.size:
+        print("Файл статистики использования поврежден, начинаем заново")
+        return {}
+    return {raw_id.rstrip(b"\0").decode('ascii'): (score, stamp)
+            for raw_id, score, stamp in ENTRY.iter_unpack(memoryview(blob)[len(MAGIC):])}
+
+
+class UsageStore:
+    """Затухающие счета использования записей, загружаемые целиком в память"""
+
+    def __init__(self, path=None):
+        self.path = path or get_usage_file()
+        # id -> (счет, время обновления счета)
+        self.entries = {}
+        # Использования этого процесса, еще не записанные в файл (в том же виде)
+        self.pending = {}
+        self.load()
+
+    def load(self):
+        """Читает файл статистики (несколько килобайт, один вызов read)"""
+        self.entries = read_entries(self.path)
+        self.pending = {}
+
+    def merge_disk(self, now):
+        """Переносит свои новые использования на текущую версию файла.
+
+        Файл могли записать фоновый процесс, get --copy или другое окно -
+        их счета сохраняются, а не затираются счетами этого процесса.
+        """
+        entries = read_entries(self.path)
+        for node_id, (score, stamp) in self.pending.items():
+            base_score, base_stamp = entries.get(node_id, (0.0, now))
+            entries[node_id] = (decay(base_score, base_stamp, now) + decay(score, stamp, now), now)
+        self.entries = entries
+        self.pending = {}
+
+    def save(self, now=None):
+        """Атомарно записывает статистику, забывая устаревшие записи"""
+        now = time.time() if now is None else now
+        self.merge_disk(now)
+        self.prune(now)
+        blob = MAGIC + b"".join(ENTRY.pack(node_id.encode('ascii'), score, stamp)
+                                for node_id, (score, stamp) in self.entries.items())
+        try:
+            vault_storage.atomic_write_private(self.path, blob)
+        except OSError as e:
+            print(f"Ошибка сохранения статистики использования: {e}")
+
+    def prune(self, now=None):
+        """Удаляет затухшие записи и оставляет не больше MAX_ENTRIES"""
+        now = time.time() if now is None else now
+        scores = self.scores(now)
+        kept = sorted((node_id for node_id, score in scores.items() if score >= MIN_SCORE),
+                      key=scores.get, reverse=True)[:MAX_ENTRIES]
+        self.entries = {node_id: self.entries[node_id] for node_id in kept}
+
+    def record(self, node_id, now=None):
+        """Отмечает использование записи и сохраняет статистику"""
+        if not node_id:
+            return
+        try:
+            if len(node_id.encode('ascii')) > ENTRY.size - 16:
+                return
+        except UnicodeEncodeError:
+            # id из чужого файла - статистику для него не ведем
+            return
+        now = time.time() if now is None else now
+        for counts in (self.entries, self.pending):
+            score, stamp = counts.get(node_id, (0.0, now))
+            counts[node_id] = (decay(score, stamp, now) + 1.0, now)
+        self.save(now)
+
+    def scores(self, now=None):
+        """Текущие счета всех записей"""
+        now = time.time() if now is None else now
+        return {node_id: decay(score, stamp, now)
+                for node_id, (score, stamp) in self.entries.items()}
+
+    def top(self, count, now=None):
+        """id записей с наибольшим счетом"""
+        scores = self.scores(now)
+        return sorted(scores, key=scores.get, reverse=True)[:count]
@@ -0,0 +1,204 @@
+#vault_index.py
+# Индекс записей по постоянным идентификаторам: узел, имя, запись
+# и родительская папка для каждого id строятся один раз при загрузке
+import secrets
+
+
+def new_node_id():
+    """Новый постоянный идентификатор записи"""
+    return secrets.token_hex(6)
+
+
+def split_record(record):
+    """Возвращает пару (имя, узел) для записи вида {имя: узел}"""
+    return next(iter(record.items()))
+
+
+def is_folder(node):
+    """Проверяет, является ли узел папкой"""
+    return isinstance(node, dict) and node.get('type') == 'folder'
+
+
+class VaultIndex:
+    """Индекс id -> узел с указателями на родительские папки"""
+
+    def __init__(self, data):
+        self.data = data
+        self.nodes = {}
+        self.records = {}
+        self.parents = {}
+        self.changed = False
+        # Подписчики (например, поисковый индекс) получают node_added/node_removed
+        # при каждом изменении и reset после полной перестройки
+        self.listeners = []
+        self.rebuild()
+
+    def rebuild(self):
+        """Строит индекс заново, выдавая id записям без него.
+
+        Возвращает True, если пришлось выдать новые id (их нужно сохранить).
+        """
+        self.nodes = {}
+        self.records = {}
+        self.parents = {}
+        self.changed = False
+        # Подписчики перестраиваются один раз целиком, а не по записи
+        listeners, self.listeners = self.listeners, []
+        try:
+            self.register_children(self.data, None)
+        finally:
+            self.listeners = listeners
+        for listener in self.listeners:
+            listener.reset()
+        return self.changed
+
+    def register_children(self, records, parent_id):
+        """Добавляет в индекс записи папки и все их вложенные записи"""
+        for record in records:
+            name, node = split_record(record)
+            node_id = node.get('id')
+            if not node_id or node_id in self.nodes:
+                # Нет id или он повторяется (например, после импорта своего же экспорта)
+                node = dict(node)
+                node['id'] = new_node_id()
+                record[name] = node
+                node_id = node['id']
+                self.changed = True
+
+            self.nodes[node_id] = node
+            self.records[node_id] = record
+            self.parents[node_id] = parent_id
+            for listener in self.listeners:
+                listener.node_added(node_id, name, node)
+            if is_folder(node):
+                self.register_children(node.get('value', []), node_id)
+
+    def unregister(self, node_id):
+        """Удаляет из индекса запись и все вложенные в нее записи"""
+        node = self.nodes.pop(node_id)
+        del self.records[node_id]
+        del self.parents[node_id]
+        for listener in self.listeners:
+            listener.node_removed(node_id)
+        if is_folder(node):
+            for record in node.get('value', []):
+                self.unregister(split_record(record)[1]['id'])
+
+    def __contains__(self, node_id):
+        return node_id in self.nodes
+
+    def name(self, node_id):
+        """Имя записи"""
+        return split_record(self.records[node_id])[0]
+
+    def children(self, folder_id):
+        """Список записей папки (None - корень)"""
+        if folder_id is None:
+            return self.data
+        return self.nodes[folder_id].setdefault('value', [])
+
+    def position(self, node_id):
+        """Позиция записи в родительской папке"""
+        record = self.records[node_id]
+        for position, sibling in enumerate(self.children(self.parents[node_id])):
+            if sibling is record:
+                return position
+        raise KeyError(node_id)
+
+    def ancestors(self, node_id):
+        """Цепочка id папок от корня до родителя записи"""
+        chain = []
+        parent_id = self.parents.get(node_id)
+        while parent_id is not None:
+            chain.append(parent_id)
+            parent_id = self.parents[parent_id]
+        chain.reverse()
+        return chain
+
+    def resolve(self, path, separator="/"):
+        """id записи по пути из имен папок или None.
+
+        Имена могут сами содержать разделитель: "a/b" ищется и как папка
+        "a" с записью "b", и как запись с именем "a/b".
+        """
+        return next(self.matches(path, separator), None)
+
+    def resolve_all(self, path, separator="/"):
+        """id всех записей, подходящих под путь (несколько - путь неоднозначен)"""
+        return list(self.matches(path, separator))
+
+    def matches(self, path, separator):
+        """Перебирает id записей, подходящих под путь, в порядке дерева"""
+        parts = [part for part in path.split(separator) if part]
+        if parts:
+            yield from self.match_parts(None, parts, separator)
+
+    def match_parts(self, folder_id, parts, separator):
+        """Ищет оставшиеся части пути в папке folder_id"""
+        for record in self.children(folder_id):
+            name, node = split_record(record)
+            for count in range(1, len(parts) + 1):
+                if name != separator.join(parts[:count]):
+                    continue
+                if count == len(parts):
+                    yield node['id']
+                elif is_folder(node):
+                    yield from self.match_parts(node['id'], parts[count:], separator)
+
+    def insert(self, parent_id, position, record):
+        """Вставляет запись в папку"""
+        self.children(parent_id).insert(position, record)
+        self.register_children([record], parent_id)
+
+    def edit(self, node_id, name, node_type, value=None):
+        """Меняет имя, тип и значение записи на месте.
+
+        Вложенные записи папки остаются на месте и в индексе не
+        перерегистрируются; при смене папки на запись они удаляются.
+        """
+        record = self.records[node_id]
+        old_name, node = split_record(record)
+        if is_folder(node) and node_type != 'folder':
+            for child in node.get('value', []):
+                self.unregister(split_record(child)[1]['id'])
+            node['value'] = []
+        if node_type == 'folder':
+            if not is_folder(node):
+                node['value'] = []
+        else:
+            node['value'] = value
+        node['type'] = node_type
+
+        if name != old_name:
+            # Сама запись (словарь) остается тем же объектом - на нее ссылается индекс
+            record.clear()
+            record[name] = node
+            for listener in self.listeners:
+                listener.node_removed(node_id)
+                listener.node_added(node_id, name, node)
+
+    def delete(self, node_id):
+        """Удаляет запись вместе с вложенными записями"""
+        parent_id = self.parents[node_id]
+        position = self.position(node_id)
+        self.unregister(node_id)
+        del self.children(parent_id)[position]
+
+    def move(self, node_id, position):
+        """Перемещает запись на новую позицию в той же папке"""
+        siblings = self.children(self.parents[node_id])
+        siblings.insert(position, siblings.pop(self.position(node_id)))
+
+    def apply(self, operation):
+        """Применяет операцию журнала, адресованную по id"""
+        kind = operation['op']
+        if kind == 'insert':
+            self.insert(operation['parent'], operation['index'], operation['record'])
+        elif kind == 'edit':
+            self.edit(operation['id'], operation['name'], operation['type'], operation.get('value'))
+        elif kind == 'delete':
+            self.delete(operation['id'])
+        elif kind == 'move':
+            self.move(operation['id'], operation['to'])
+        else:
+            raise ValueError(f"Неизвестная операция журнала: {kind}")
@@ -0,0 +1,428 @@
+#vault_journal.py
+# Журнал изменений поверх снимка creds.json: каждая правка дописывается
+# небольшой записью, а полный снимок перестраивается в фоне
+import json
+import _thread
+import os
+import time
+
+import vault_storage
+from vault_index import VaultIndex, split_record
+
+# Размер журнала, после которого он сворачивается в новый снимок
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+# Пауза после последней правки, после которой накопленные правки записываются
+FLUSH_DELAY = 0.3
+
+
+def get_journal_file(data_file):
+    """Путь к журналу изменений рядом с файлом данных"""
+    return os.path.splitext(data_file)[0] + '.journal'
+
+
+def operation_target(operation):
+    """id записи, к которой относится операция"""
+    if operation['op'] == 'insert':
+        return split_record(operation['record'])[1]['id']
+    return operation['id']
+
+
+def last_sequence(content):
+    """Номер последней целой операции в содержимом журнала (0 - операций нет)"""
+    for line in reversed(content.splitlines()[1:]):
+        try:
+            return json.loads(line)['seq']
+        except (ValueError, KeyError, TypeError):
+            continue
+    return 0
+
+
+class VaultJournal:
+    """Снимок данных и журнал операций с отложенной записью в фоне"""
+
+    def __init__(self, data_file, normalize=vault_storage.convert_to_unified_format, read_only=False):
+        self.data_file = data_file
+        # Только чтение (командная строка): снимок и журнал не перезаписываются,
+        # даже если данные пришлось мигрировать или выдать записям id
+        self.read_only = read_only
+        self.journal_file = get_journal_file(data_file)
+        self.normalize = normalize
+        # lock защищает данные в памяти, io_lock - порядок записи файлов.
+        # Блокировки берутся из _thread: threading нужен только фоновой записи
+        # и импортируется при первой правке (см. start_writer)
+        self.lock = _thread.RLock()
+        self.changed = None
+        self.io_lock = _thread.allocate_lock()
+        self.data = []
+        self.index = None
+        self.journal_id = None
+        self.seq = 0
+        self.journal_size = 0
+        self.handle = None
+        self.snapshot_digest = None
+        # Отметка файла данных после последнего чтения или записи этим процессом
+        self.snapshot_stamp = None
+        # Файлы меняли другие процессы, и в памяти может не быть их правок
+        self.diverged = False
+        self.written_stamp = None
+        self.pending = []
+        self.last_change = 0.0
+        self.writer_thread = None
+        self.stopping = False
+
+    def load(self):
+        """Загружает снимок и применяет к нему операции из журнала"""
+        if self.read_only:
+            # Выданные id остаются только в памяти
+            with vault_storage.vault_locked(self.data_file, shared=True):
+                self.read_files()
+            return self.data
+        with self.io_lock, vault_storage.vault_locked(self.data_file):
+            if self.read_files():
+                # Миграция и новые id должны попасть на диск до первой
+                # операции, которая на них сошлется
+                self.write_snapshot_locked()
+            self.diverged = False
+        return self.data
+
+    def read_files(self):
+        """Читает снимок и применяет журнал (под блокировкой файлов).
+
+        Возвращает True, если снимок нужно перезаписать: он был в старом
+        формате или записям пришлось выдать id.
+        """
+        document, migrated = vault_storage.read_snapshot(self.data_file, self.normalize)
+        self.snapshot_stamp = vault_storage.file_stamp(self.data_file)
+        self.data = document['records']
+        meta = document.get('journal') or {}
+        self.journal_id = meta.get('id')
+        self.seq = meta.get('seq', 0)
+        self.journal_size = 0
+        self.index = VaultIndex(self.data)
+        ids_assigned = self.index.changed
+
+        for operation in self.read_journal():
+            if operation['seq'] <= self.seq:
+                continue
+            try:
+                self.index.apply(operation)
+            except (LookupError, TypeError, ValueError) as e:
+                # Запись могли удалить в другом окне - остальные правки применяются
+                print(f"Ошибка применения журнала: {e}")
+            self.seq = operation['seq']
+
+        self.written_stamp = self.stamp()
+        return migrated or ids_assigned
+
+    def read_journal(self):
+        """Читает операции журнала, относящиеся к текущему снимку"""
+        if not self.journal_id:
+            return []
+        try:
+            with open(self.journal_file, 'rb') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return []
+
+        operations = []
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except ValueError:
+            return []
+        if header.get('journal') != self.journal_id:
+            # Журнал остался от другого снимка
+            return []
+
+        for line in lines[1:]:
+            try:
+                operations.append(json.loads(line))
+            except ValueError:
+                # Обрезанная запись после сбоя - пропускаем только ее
+                continue
+        self.journal_size = sum(len(line) + 1 for line in lines)
+        return operations
+
+    def stamp(self):
+        """Отметка изменения снимка и журнала (время и размер)"""
+        stamp = []
+        for path in (self.data_file, self.journal_file):
+            try:
+                stat = os.stat(path)
+                stamp.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def changed_externally(self):
+        """Проверяет, менял ли файлы кто-то, кроме этого процесса"""
+        return self.stamp() != self.written_stamp
+
+    def apply(self, operation):
+        """Применяет операцию к данным и ставит ее в очередь на запись.
+
+        Запись на диск выполняет фоновый поток: серия быстрых правок
+        сливается и дописывается в журнал одним fsync.
+        """
+        if self.read_only:
+            raise ValueError("Данные открыты только для чтения")
+        with self.lock:
+            self.index.apply(operation)
+            if 'record' in operation:
+                # Копия, чтобы последующие правки вложенных папок не попали в эту запись
+                operation = dict(operation, record=json.loads(json.dumps(operation['record'])))
+            self.enqueue(operation)
+            self.last_change = time.monotonic()
+        self.start_writer()
+        with self.changed:
+            self.changed.notify()
+
+    def enqueue(self, operation):
+        """Добавляет операцию в очередь, сливая ее с предыдущей, где возможно"""
+        previous = self.pending[-1] if self.pending else None
+        if previous is None or operation_target(previous) != operation_target(operation):
+            self.pending.append(operation)
+            return
+
+        kind = operation['op']
+        if kind == 'move' and previous['op'] == 'move' and previous['to'] == operation['from']:
+            # Несколько перемещений одной записи подряд - одно перемещение
+            if previous['from'] == operation['to']:
+                self.pending.pop()
+            else:
+                previous['to'] = operation['to']
+        elif kind == 'edit' and previous['op'] == 'edit':
+            # Правки одной записи подряд - последняя полностью заменяет предыдущую
+            self.pending[-1] = operation
+        elif kind == 'delete' and previous['op'] == 'insert':
+            self.pending.pop()
+        else:
+            self.pending.append(operation)
+
+    def reindex(self):
+        """Перестраивает индекс после массовых изменений данных"""
+        with self.lock:
+            self.index.rebuild()
+
+    def replace_records(self, records):
+        """Заменяет все записи (импорт, структура) и перестраивает индекс.
+
+        Список записей остается тем же объектом: на него ссылаются окно и
+        вкладки настроек. Запросы API в это время ждут блокировку.
+        """
+        with self.lock:
+            self.data[:] = records
+            self.index.rebuild()
+
+    def start_writer(self):
+        """Запускает фоновый поток записи, если он еще не работает"""
+        import threading
+
+        with self.lock:
+            if self.changed is None:
+                self.changed = threading.Condition(self.lock)
+            if self.writer_thread is None or not self.writer_thread.is_alive():
+                self.stopping = False
+                self.writer_thread = threading.Thread(target=self.writer_loop, daemon=True)
+                self.writer_thread.start()
+
+    def writer_loop(self):
+        """Фоновый поток: ждет затишья после правок и записывает их"""
+        while True:
+            with self.changed:
+                while not self.pending and not self.stopping:
+                    self.changed.wait()
+                if self.stopping:
+                    return
+                # Ждем, пока серия правок (например, удержание "+") закончится
+                while not self.stopping:
+                    remaining = self.last_change + FLUSH_DELAY - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.changed.wait(remaining)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Ошибка записи журнала: {e}")
+
+    def flush(self):
+        """Дописывает накопленные операции в журнал одним fsync"""
+        with self.io_lock:
+            with self.lock:
+                if not self.pending:
+                    return
+            with vault_storage.vault_locked(self.data_file):
+                handle = self.open_journal()
+                if handle is None:
+                    # Снимок без заголовка журнала - начинаем журнал с нового снимка
+                    self.write_snapshot_locked()
+                    return
+                with self.lock:
+                    lines = []
+                    for operation in self.pending:
+                        self.seq += 1
+                        lines.append(json.dumps(dict(operation, seq=self.seq), ensure_ascii=False).encode('utf-8'))
+                    self.pending = []
+                payload = b"\n".join(lines) + b"\n"
+
+                # Журнал открыт с O_APPEND: запись всегда идет в конец файла
+                handle.write(payload)
+                handle.flush()
+                os.fsync(handle.fileno())
+                self.journal_size += len(payload)
+                self.written_stamp = self.stamp()
+
+                if self.journal_size >= JOURNAL_COMPACT_BYTES:
+                    self.compact_locked()
+
+    def open_journal(self):
+        """Открывает журнал на дозапись (под блокировкой файлов).
+
+        Пока файлы пишет только этот процесс, используется открытый файл.
+        Если другой процесс переписал снимок или журнал, журнал открывается
+        заново, а номера операций продолжаются после уже записанных - иначе
+        новые правки отбросятся при чтении. Возвращает None, если у снимка
+        нет журнала.
+        """
+        snapshot_stamp = vault_storage.file_stamp(self.data_file)
+        if self.handle is not None and snapshot_stamp == self.snapshot_stamp and self.journal_unchanged():
+            return self.handle
+        self.close_journal()
+
+        if snapshot_stamp != self.snapshot_stamp:
+            # Снимок записал другой процесс - правки продолжают его журнал
+            self.diverged = True
+            document, migrated = vault_storage.read_snapshot(self.data_file, self.normalize)
+            meta = document.get('journal') or {}
+            with self.lock:
+                if meta.get('id') and not migrated:
+                    self.journal_id = meta['id']
+                    self.seq = max(self.seq, meta.get('seq', 0))
+            self.snapshot_stamp = snapshot_stamp
+        if not self.journal_id:
+            return None
+
+        content = b""
+        header = None
+        try:
+            with open(self.journal_file, 'rb') as f:
+                content = f.read()
+            header = json.loads(content.split(b"\n", 1)[0])
+        except (OSError, ValueError):
+            pass
+        if not isinstance(header, dict) or header.get('journal') != self.journal_id:
+            self.start_journal()
+            return self.handle
+
+        end = content.rfind(b"\n") + 1
+        if end < len(content):
+            # Отбрасываем обрезанную после сбоя запись, иначе она склеится со следующей
+            os.truncate(self.journal_file, end)
+        written = max(header.get('seq', 0), last_sequence(content[:end]))
+        with self.lock:
+            if written > self.seq:
+                # В журнале есть правки других процессов
+                self.diverged = True
+                self.seq = written
+        self.handle = vault_storage.open_private(self.journal_file, append=True)
+        self.journal_size = end
+        return self.handle
+
+    def journal_unchanged(self):
+        """Проверяет, что в журнал после этого процесса никто не писал"""
+        try:
+            disk = os.stat(self.journal_file)
+            own = os.fstat(self.handle.fileno())
+        except OSError:
+            return False
+        return ((disk.st_dev, disk.st_ino) == (own.st_dev, own.st_ino)
+                and disk.st_size == self.journal_size)
+
+    def start_journal(self):
+        """Начинает журнал заново с заголовка (под блокировкой файлов).
+
+        Файл заменяется переименованием, поэтому другие процессы видят
+        новый inode и открывают журнал заново, а не пишут по старому смещению.
+        """
+        self.close_journal()
+        line = json.dumps({'journal': self.journal_id, 'seq': self.seq}).encode('utf-8') + b"\n"
+        tmp_file = self.journal_file + '.tmp'
+        with vault_storage.open_private(tmp_file) as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.journal_file)
+        self.handle = vault_storage.open_private(self.journal_file, append=True)
+        self.journal_size = len(line)
+
+    def close_journal(self):
+        """Закрывает файл журнала"""
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def write_snapshot(self):
+        """Синхронно записывает полный снимок из памяти и начинает журнал заново"""
+        with self.io_lock, vault_storage.vault_locked(self.data_file):
+            self.write_snapshot_locked()
+
+    def compact_locked(self):
+        """Сворачивает журнал в снимок (под io_lock и блокировкой файлов).
+
+        Если в журнале есть правки других процессов, которых нет в памяти,
+        снимок собирается из файлов, а данные в памяти не меняются.
+        """
+        if not self.diverged:
+            self.write_snapshot_locked()
+            return
+        disk = VaultJournal(self.data_file, self.normalize)
+        disk.read_files()
+        with self.lock:
+            self.journal_id = disk.journal_id or self.journal_id
+            self.seq = max(self.seq, disk.seq)
+            document = vault_storage.pack_document(disk.data, {'id': self.journal_id, 'seq': self.seq})
+        self.store_snapshot(*vault_storage.serialize_snapshot(document))
+
+    def write_snapshot_locked(self):
+        """Сворачивает данные и журнал в снимок (под io_lock и блокировкой файлов).
+
+        Снимок включает и еще не записанные операции, поэтому журнал после
+        него содержит только заголовок.
+        """
+        with self.lock:
+            if not self.journal_id:
+                self.journal_id = vault_storage.new_journal_id()
+            self.seq += len(self.pending)
+            self.pending = []
+            document = vault_storage.pack_document(self.data, {'id': self.journal_id, 'seq': self.seq})
+            raw, payload = vault_storage.serialize_snapshot(document)
+        self.store_snapshot(raw, payload)
+
+    def store_snapshot(self, raw, payload):
+        """Записывает сериализованный снимок и начинает журнал заново.
+
+        Если снимок совпадает с записанным этим процессом и файл с тех пор
+        никто не менял, файл данных не трогается.
+        """
+        digest = vault_storage.content_hash(raw)
+        if digest != self.snapshot_digest or vault_storage.file_stamp(self.data_file) != self.snapshot_stamp:
+            vault_storage.write_snapshot(self.data_file, raw, payload)
+            self.snapshot_digest = digest
+            self.snapshot_stamp = vault_storage.file_stamp(self.data_file)
+
+        # Все операции журнала уже учтены в снимке
+        self.start_journal()
+        self.written_stamp = self.stamp()
+
+    def close(self):
+        """Останавливает фоновую запись, сбрасывая все накопленные правки"""
+        if self.changed is not None:
+            with self.changed:
+                self.stopping = True
+                self.changed.notify()
+        if self.writer_thread is not None:
+            self.writer_thread.join()
+            self.writer_thread = None
+        self.flush()
+        with self.io_lock:
+            self.close_journal()
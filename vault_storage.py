@@ -0,0 +1,339 @@
+#vault_storage.py
+# Чтение и запись файла учетных данных без зависимостей от tkinter
+import gc
+import hashlib
+import json
+import marshal
+import os
+import secrets
+import struct
+import sys
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: блокировки записи между процессами нет
+    fcntl = None
+
+from vault_index import VaultIndex
+
+# Увеличивается при изменении формата кэша
+CACHE_VERSION = 2
+
+# Версия формата файла данных. Версия 1 - список без заголовка, где папки
+# могли быть списками, а значения - простыми строками. Версия 2 - заголовок
+# с журналом, у каждого узла есть постоянное поле id.
+FORMAT_VERSION = 2
+
+
+def get_data_file():
+    """Путь к файлу учетных данных"""
+    return os.path.join(os.path.expanduser('~'), '.credmanager', 'creds.json')
+
+
+def get_cache_file(data_file):
+    """Путь к бинарному кэшу рядом с файлом данных"""
+    return os.path.splitext(data_file)[0] + '.cache'
+
+
+def get_lock_file(data_file):
+    """Путь к файлу блокировки записи рядом с файлом данных"""
+    return os.path.splitext(data_file)[0] + '.lock'
+
+
+def file_stamp(path):
+    """Отметка файла (inode, время и размер) или None, если его нет"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+@contextmanager
+def vault_locked(data_file, shared=False):
+    """Не дает другим процессам писать снимок и журнал (flock).
+
+    Запись идет под исключительной блокировкой, чтение без записи
+    (shared) - под разделяемой. Блокировка не повторная: внутри нее эту
+    функцию вызывать нельзя.
+    """
+    fd = None
+    if fcntl is not None:
+        try:
+            fd = os.open(get_lock_file(data_file), os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            # В каталог нельзя писать - значит, и снимок в нем никто не перепишет
+            if not shared:
+                raise
+    if fd is None:
+        yield
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        # Закрытие снимает блокировку
+        os.close(fd)
+
+
+def content_hash(raw):
+    """Хэш содержимого файла данных"""
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def cache_key(stat, digest):
+    """Ключ, по которому проверяется актуальность кэша"""
+    return (CACHE_VERSION, marshal.version, tuple(sys.version_info[:2]),
+            stat.st_mtime_ns, stat.st_size, digest)
+
+
+@contextmanager
+def gc_paused():
+    """Отключает сборщик мусора на время построения большого дерева.
+
+    Без этого разбор десятков тысяч словарей тратит больше времени
+    на циклические проходы GC, чем на сам разбор.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def open_private(path, append=False):
+    """Открывает файл на запись с правами только для владельца (0600).
+
+    В файлах кэша и журнала лежат все значения открытым текстом, поэтому
+    права по умолчанию (обычно 0644) для них не подходят.
+    """
+    # O_BINARY (Windows): иначе каждый \n в файле превращается в \r\n
+    flags = (os.O_WRONLY | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+             | (os.O_APPEND if append else os.O_TRUNC))
+    fd = os.open(path, flags, 0o600)
+    try:
+        if hasattr(os, 'fchmod'):
+            # Файл мог остаться от прошлых версий с более широкими правами
+            os.fchmod(fd, 0o600)
+        return os.fdopen(fd, 'ab' if append else 'wb')
+    except Exception:
+        os.close(fd)
+        raise
+
+
+def atomic_write_private(path, data):
+    """Атомарно заменяет файл байтами data; новый файл доступен только владельцу.
+
+    Временный файл у каждого процесса свой, поэтому одновременные записи
+    не смешиваются. При ошибке он удаляется, а OSError передается дальше.
+    """
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open_private(tmp_file) as f:
+            f.write(data)
+        os.replace(tmp_file, path)
+    except OSError:
+        try:
+            os.unlink(tmp_file)
+        except OSError:
+            pass
+        raise
+
+
+def load_cache(data_file, stat, digest):
+    """Загружает нормализованные данные из кэша, если он актуален.
+
+    Возвращает None, если кэша нет или он не соответствует файлу данных.
+    Формат кэша: длина заголовка, заголовок и данные в формате marshal.
+    """
+    try:
+        with open(get_cache_file(data_file), 'rb') as f:
+            blob = f.read()
+        header_size, = struct.unpack_from('<I', blob)
+        header = memoryview(blob)[4:4 + header_size]
+        if marshal.loads(header) != cache_key(stat, digest):
+            return None
+        with gc_paused():
+            return marshal.loads(memoryview(blob)[4 + header_size:])
+    except (OSError, EOFError, ValueError, TypeError, struct.error):
+        return None
+
+
+def store_cache(data_file, payload, stat, digest):
+    """Сохраняет уже сериализованный (marshal) документ в кэш"""
+    cache_file = get_cache_file(data_file)
+    tmp_file = cache_file + '.tmp'
+    try:
+        header = marshal.dumps(cache_key(stat, digest))
+        with open_private(tmp_file) as f:
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            f.write(payload)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"Ошибка записи кэша: {e}")
+        try:
+            os.unlink(tmp_file)
+        except OSError:
+            pass
+
+
+def convert_to_unified_format(data):
+    """Конвертирует данные в единый формат"""
+    if isinstance(data, list):
+        converted_data = []
+        for item in data:
+            if isinstance(item, dict):
+                converted_item = {}
+                for key, value in item.items():
+                    converted_item[key] = convert_value_to_unified_format(value)
+                converted_data.append(converted_item)
+        return converted_data
+    return data
+
+
+def convert_value_to_unified_format(value):
+    """Конвертирует отдельное значение в единый формат"""
+    if isinstance(value, list):
+        # Старый формат папки
+        return {'type': 'folder', 'value': convert_to_unified_format(value)}
+    elif isinstance(value, dict):
+        if 'type' in value:
+            # Уже в новом формате
+            if value['type'] == 'folder' and isinstance(value.get('value'), list):
+                value['value'] = convert_to_unified_format(value['value'])
+            return value
+        else:
+            # Словарь без типа - считаем текстом
+            return {'type': 'text', 'value': str(value)}
+    else:
+        # Простая строка
+        return {'type': 'text', 'value': str(value)}
+
+
+def is_current_format(document):
+    """Проверяет, что документ уже в текущем формате и не требует миграции"""
+    if isinstance(document, dict):
+        version = document.get('format_version')
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия формата данных: {version}")
+        return True
+    return False
+
+
+def unpack_document(document, normalize=convert_to_unified_format):
+    """Достает записи из документа, мигрируя список без заголовка (версия 1).
+
+    Возвращает пару (записи, была_ли_миграция).
+    """
+    if is_current_format(document):
+        return document.get('records', []), False
+    records = normalize(document)
+    # Выдаем постоянные id записям, у которых их еще нет
+    VaultIndex(records)
+    return records, True
+
+
+def new_journal_id():
+    """Идентификатор журнала изменений, привязанного к снимку"""
+    return secrets.token_hex(8)
+
+
+def pack_document(records, journal=None):
+    """Оборачивает записи в документ с заголовком версии формата.
+
+    journal - идентификатор и номер последней операции журнала, уже
+    учтенной в снимке. Без него снимок начинает новый журнал, и любой
+    оставшийся от прошлого снимка журнал будет проигнорирован.
+    """
+    if journal is None:
+        journal = {'id': new_journal_id(), 'seq': 0}
+    return {'format_version': FORMAT_VERSION, 'journal': journal, 'records': records}
+
+
+def read_snapshot(data_file, normalize=convert_to_unified_format):
+    """Читает снимок данных, используя кэш, если файл не менялся.
+
+    Файлы текущей версии формата загружаются без обхода дерева, файлы
+    старого формата нормализуются. Возвращает пару (документ с записями и
+    заголовком журнала, была_ли_миграция); мигрированный документ
+    вызывающий перезаписывает сам, под блокировкой файлов.
+    """
+    stat = os.stat(data_file)
+    with open(data_file, 'rb') as f:
+        raw = f.read()
+    digest = content_hash(raw)
+
+    document = load_cache(data_file, stat, digest)
+    if document is not None:
+        return document, False
+
+    with gc_paused():
+        document = json.loads(raw)
+        records, migrated = unpack_document(document, normalize)
+
+    if migrated:
+        # У списка без заголовка нет журнала - начинаем новый
+        return pack_document(records), True
+    store_cache(data_file, marshal.dumps(document), stat, digest)
+    return document, False
+
+
+def serialize_snapshot(document):
+    """Сериализует документ для файла данных и для кэша.
+
+    Вызывается под блокировкой данных, запись на диск - уже без нее.
+    """
+    raw = json.dumps(document, indent=2, ensure_ascii=False).encode('utf-8')
+    return raw, marshal.dumps(document)
+
+
+def write_snapshot(data_file, raw, payload):
+    """Атомарно записывает снимок: временный файл, fsync и переименование.
+    Вызывается под блокировкой файлов (vault_locked).
+
+    Прерванная запись не может оставить обрезанный файл данных. Новый
+    файл создается только для владельца, у существующего права сохраняются.
+    """
+    try:
+        mode = os.stat(data_file).st_mode & 0o777
+    except OSError:
+        mode = None
+    tmp_file = data_file + '.tmp'
+    with open_private(tmp_file) as f:
+        if mode is not None and hasattr(os, 'fchmod'):
+            os.fchmod(f.fileno(), mode)
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, data_file)
+    fsync_directory(os.path.dirname(data_file))
+    store_cache(data_file, payload, os.stat(data_file), content_hash(raw))
+
+
+def fsync_directory(path):
+    """Сбрасывает на диск запись каталога после переименования (где возможно)"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    try:
+        fd = os.open(path or '.', os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_vault(data_file, data):
+    """Записывает файл данных в текущем формате с новым журналом"""
+    raw, payload = serialize_snapshot(pack_document(data))
+    with vault_locked(data_file):
+        write_snapshot(data_file, raw, payload)